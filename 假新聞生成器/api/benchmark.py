@@ -0,0 +1,76 @@
+"""比較 /generate 回應的兩種序列化路徑
+
+舊路徑：組 dict 時逐筆 isoformat()，再經 GenerateResponse 驗證、jsonable_encoder 與 JSONResponse。
+新路徑：FastJSONResponse 直接序列化（有 orjson 時使用 orjson），可選擇壓縮。
+
+用法: python -m api.benchmark [標題數量] [重複次數]
+"""
+import sys
+import time
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from api.serialization import FastJSONResponse, brotli, compress, dumps, headline_payload, orjson
+from api.models import GenerateResponse
+from core.generator import FakeNewsGenerator
+
+def sample_results(count):
+    """產生 count 筆與 generate_headlines_batch 格式相同的結果"""
+    generator = FakeNewsGenerator(filter_perplexity=False)
+    now = datetime.now()
+    return [
+        {"headline": h["headline"], "category": h["category"], "created_at": now, "keywords_used": h["keywords"]}
+        for h in generator.generate_bulk(count)
+    ]
+
+def pydantic_path(results):
+    """原本的序列化方式"""
+    headlines = [
+        {
+            "headline": result["headline"],
+            "category": result["category"],
+            "created_at": result["created_at"].isoformat(),
+            "keywords_used": result.get("keywords_used")
+        }
+        for result in results
+    ]
+    content = {"success": True, "count": len(headlines), "headlines": headlines, "execution_time": 0.0}
+    return JSONResponse(jsonable_encoder(GenerateResponse(**content))).body
+
+def fast_path(results, encoding=None):
+    """FastJSONResponse 序列化方式（與 FastJSONResponse.create 相同的工作，只是壓縮不經執行緒池）"""
+    headlines = [headline_payload(result) for result in results]
+    content = {"success": True, "count": len(headlines), "headlines": headlines, "execution_time": 0.0}
+    body = dumps(content)
+    if encoding:
+        body = compress(body, encoding)
+    return FastJSONResponse(body, content_encoding=encoding).body
+
+def benchmark(count=1000, rounds=50):
+    """對每種路徑重複 rounds 次，返回 {路徑: (平均毫秒, 回應位元組數)}"""
+    results = sample_results(count)
+    paths = {
+        "pydantic + json": lambda: pydantic_path(results),
+        "fast (" + ("orjson" if orjson else "json") + ")": lambda: fast_path(results),
+        "fast + gzip": lambda: fast_path(results, "gzip"),
+    }
+    if brotli is not None:
+        paths["fast + br"] = lambda: fast_path(results, "br")
+
+    report = {}
+    for name, run in paths.items():
+        body = run()  # 預熱
+        start = time.perf_counter()
+        for _ in range(rounds):
+            run()
+        report[name] = ((time.perf_counter() - start) / rounds * 1000, len(body))
+    return report
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"=== 序列化 {count} 個標題，重複 {rounds} 次 ===")
+    report = benchmark(count, rounds)
+    baseline = report["pydantic + json"][0]
+    for name, (elapsed, size) in report.items():
+        print(f"{name:<18} {elapsed:8.2f} ms  {size:>9} bytes  x{baseline / elapsed:.1f}")
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from fastapi.concurrency import run_in_threadpool
+from core.template_engine import TemplateEngine
+
+logger = logging.getLogger(__name__)
+
+class HeadlinePool:
+    """按類別預先生成並過濾好的標題池
+
+    請求直接從池中取出標題；某個類別的存量低於 low_water 時，背景任務補充到 capacity。
+    類別 None 代表不限類別。同一類別池中的標題不重複。
+    """
+
+    def __init__(self, generator, categories=(None,), capacity=500, low_water=100,
+                 refill_batch=100, max_categories=32, known_categories=None):
+        """初始化標題池
+
+        categories: 啟動時就預先填充的類別，其他類別在第一次被請求後才建立
+        max_categories: 最多建立的類別池數量，避免任意類別名稱佔用記憶體
+        known_categories: 模板中實際存在的類別，只為這些類別建立池；None 表示不限制
+        """
+        self.generator = generator
+        self.known_categories = (
+            None if known_categories is None
+            else {self.normalize_category(category) for category in known_categories}
+        )
+        self.capacity = capacity
+        self.low_water = low_water
+        self.refill_batch = refill_batch
+        self.max_categories = max_categories
+        self._pools = {category: deque() for category in categories}
+        self._pooled = {category: set() for category in categories}  # 類別 -> 目前在池中的標題文字
+        self._low_since = {}  # 類別 -> 低於低水位的時間點，用於計算補充延遲
+        self._wakeup = None
+        self._task = None
+        self.metrics = {
+            "requests": 0,
+            "hits": 0,            # 完全由池中取得
+            "partial_hits": 0,    # 部分由池中取得
+            "misses": 0,          # 池中沒有任何可用標題
+            "served_from_pool": 0,
+            "refills": 0,
+            "refilled_headlines": 0,
+            "refill_errors": 0,
+            "last_refill_lag": 0.0,
+            "max_refill_lag": 0.0,
+        }
+
+    async def start(self):
+        """啟動背景補充任務"""
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        """停止背景補充任務"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @staticmethod
+    def normalize_category(category):
+        """正規化類別名稱，空白類別視為不限類別 (None)"""
+        return TemplateEngine.normalize_category(category) or None
+
+    def take(self, count, category=None):
+        """從池中取出最多 count 個標題，不足的部分由呼叫端自行生成"""
+        self.metrics["requests"] += 1
+        category = self.normalize_category(category)
+        pool = self._pools.get(category)
+        if pool is None and self._can_create_pool(category):
+            pool = self._pools[category] = deque()
+            self._pooled[category] = set()
+
+        results = []
+        while pool and len(results) < count:
+            try:
+                result = pool.popleft()
+            except IndexError:
+                break
+            self._pooled[category].discard(result["headline"])
+            results.append(result)
+
+        if len(results) == count:
+            self.metrics["hits"] += 1
+        elif results:
+            self.metrics["partial_hits"] += 1
+        else:
+            self.metrics["misses"] += 1
+        self.metrics["served_from_pool"] += len(results)
+
+        if pool is not None and len(pool) < self.low_water:
+            self._low_since.setdefault(category, time.monotonic())
+            if self._wakeup:
+                self._wakeup.set()
+        return results
+
+    def _can_create_pool(self, category):
+        """只為存在的類別建立池，且不超過 max_categories"""
+        if len(self._pools) >= self.max_categories:
+            return False
+        return category is None or self.known_categories is None or category in self.known_categories
+
+    def stats(self):
+        """返回池的統計資訊"""
+        requests = self.metrics["requests"]
+        return dict(
+            self.metrics,
+            hit_rate=self.metrics["hits"] / requests if requests else 0.0,
+            sizes={str(category): len(pool) for category, pool in self._pools.items()},
+        )
+
+    async def _refill_loop(self):
+        """背景補充循環：每次被喚醒時把低於低水位的類別補滿"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            for category, pool in list(self._pools.items()):
+                if len(pool) >= self.low_water:
+                    continue
+                self._low_since.setdefault(category, time.monotonic())
+                failed = False
+                while len(pool) < self.capacity:
+                    try:
+                        batch = await run_in_threadpool(
+                            self.generator.generate_headlines_batch,
+                            count=min(self.refill_batch, self.capacity - len(pool)),
+                            category=category,
+                            enhance_ratio=0
+                        )
+                    except Exception as e:
+                        self.metrics["refill_errors"] += 1
+                        logger.error(f"補充類別 '{category}' 的標題池時發生錯誤: {str(e)}")
+                        failed = True
+                        await asyncio.sleep(1)
+                        break
+                    if not batch:
+                        break
+                    # 每次補充是獨立的一批，只加入池中還沒有的標題
+                    pooled = self._pooled[category]
+                    fresh = []
+                    for result in batch:
+                        if result["headline"] not in pooled:
+                            pooled.add(result["headline"])
+                            fresh.append(result)
+                    if not fresh:
+                        break
+                    pool.extend(fresh)
+                    self.metrics["refilled_headlines"] += len(fresh)
+
+                if failed:
+                    continue  # 失敗不計入補充次數，低水位起始時間保留到下次成功補充
+                self.metrics["refills"] += 1
+                lag = time.monotonic() - self._low_since.pop(category, time.monotonic())
+                self.metrics["last_refill_lag"] = lag
+                self.metrics["max_refill_lag"] = max(self.metrics["max_refill_lag"], lag)
@@ -0,0 +1,30 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+# 請求模型
+class GenerateRequest(BaseModel):
+    count: int = Field(1, description="要生成的標題數量", ge=1, le=1000)
+    category: Optional[str] = Field(None, description="標題類別(如政治,科技)")
+    enhance: bool = Field(False, description="是否使用語言模型增強")
+
+class SearchRequest(BaseModel):
+    query: str = Field(..., description="搜索關鍵詞")
+    limit: int = Field(20, description="最大結果數", ge=1, le=100)
+
+# 回應模型
+class HeadlineResponse(BaseModel):
+    headline: str
+    category: str
+    created_at: str
+    keywords_used: Optional[Dict[str, str]] = None
+
+class GenerateResponse(BaseModel):
+    success: bool
+    count: int
+    headlines: List[HeadlineResponse]
+    execution_time: float
+
+class SearchResponse(BaseModel):
+    success: bool
+    count: int
+    headlines: List[HeadlineResponse]
@@ -0,0 +1,126 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+class RateLimitExceeded(Exception):
+    """請求超出限額，retry_after 為建議的重試秒數"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """令牌桶：每秒補充 rate 個令牌，最多存 capacity 個"""
+
+    def __init__(self, rate, capacity):
+        """初始化令牌桶（一開始是滿的）"""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, cost):
+        """嘗試取出 cost 個令牌，成功返回 0，否則返回需要等待的秒數"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        cost = min(cost, self.capacity)  # 單一請求最多花光整個桶，不會永遠無法通過
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class Admission:
+    """一次已獲准的請求，處理完畢後呼叫 release 歸還並發額度（可重複呼叫）"""
+
+    def __init__(self, controller, weight):
+        self.controller = controller
+        self.weight = weight
+        self._released = False
+
+    def release(self):
+        """歸還並發額度"""
+        if not self._released:
+            self._released = True
+            self.controller._release(self.weight)
+
+
+class AdmissionController:
+    """/generate 的准入控制
+
+    每個客戶端（已驗證的 API key，否則為 IP）一個令牌桶限制速率，另有全域的加權並發上限；
+    請求的權重為 count，啟用語言模型增強時乘上 enhance_weight。
+    """
+
+    def __init__(self, rate=50, burst=2000, max_inflight=4000, enhance_weight=5,
+                 max_clients=10000, busy_retry_after=1, api_keys=None):
+        """初始化准入控制
+
+        rate / burst: 每個客戶端每秒補充的權重與可累積的上限
+        max_inflight: 全域同時處理中的權重上限
+        max_clients: 最多保留的客戶端令牌桶數，超過時淘汰最久未使用的
+        busy_retry_after: 並發已滿時建議的重試秒數
+        api_keys: 有效的 API key；只有這些 key 會各自擁有令牌桶，其他請求一律依 IP 計算
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_inflight = max_inflight
+        self.enhance_weight = enhance_weight
+        self.max_clients = max_clients
+        self.busy_retry_after = busy_retry_after
+        self.api_keys = frozenset(api_keys or ())
+        self.inflight = 0
+        self.metrics = {"admitted": 0, "rate_limited": 0, "over_capacity": 0}
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def weight(self, count, enhance=False):
+        """計算請求的權重"""
+        return count * (self.enhance_weight if enhance else 1)
+
+    def admit(self, client, count, enhance=False):
+        """檢查並登記一個請求，超出限額時拋出 RateLimitExceeded"""
+        weight = self.weight(count, enhance)
+        with self._lock:
+            if self.inflight > 0 and self.inflight + weight > self.max_inflight:
+                self.metrics["over_capacity"] += 1
+                raise RateLimitExceeded("伺服器忙碌中，請稍後再試", self.busy_retry_after)
+
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+
+            wait = bucket.consume(weight)
+            if wait > 0:
+                self.metrics["rate_limited"] += 1
+                raise RateLimitExceeded("請求過於頻繁，請稍後再試", math.ceil(wait))
+
+            self.inflight += weight
+            self.metrics["admitted"] += 1
+        return Admission(self, weight)
+
+    def _release(self, weight):
+        with self._lock:
+            self.inflight -= weight
+
+    def stats(self):
+        """返回准入控制的統計資訊"""
+        with self._lock:
+            return dict(self.metrics, inflight=self.inflight, max_inflight=self.max_inflight,
+                        clients=len(self._buckets))
+
+
+def client_key(request, api_keys=()):
+    """以有效的 X-API-Key 識別客戶端，沒有或無效時使用來源 IP（避免輪換假 key 繞過限額）"""
+    api_key = request.headers.get("x-api-key")
+    if api_key and api_key in api_keys:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
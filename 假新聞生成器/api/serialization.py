@@ -0,0 +1,112 @@
+import gzip
+import json
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # 未安裝時退回標準庫 json
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 未安裝時只提供 gzip
+    brotli = None
+
+COMPRESS_MIN_SIZE = 4096  # 回應小於此位元組數時不壓縮，壓縮的開銷比省下的傳輸時間多
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"無法序列化 {type(value).__name__}")
+
+def dumps(content):
+    """把內容序列化為 UTF-8 JSON 位元組（datetime 輸出為 ISO 8601 字串）"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def headline_payload(result):
+    """把生成結果或資料庫文件轉為回應中的標題物件，created_at 保留 datetime 交給 dumps 處理
+
+    舊文件沒有 created_at 時改用 ObjectId 的建立時間，再沒有則為空字串。
+    """
+    created_at = result.get("created_at")
+    if created_at is None:
+        created_at = getattr(result.get("_id"), "generation_time", "")
+    return {
+        "headline": result["headline"],
+        "category": result.get("category", ""),
+        "created_at": created_at,
+        "keywords_used": result.get("keywords_used"),
+    }
+
+def _parse_accept_encoding(accept_encoding):
+    """解析 Accept-Encoding，返回 {編碼: q 值}"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+def choose_encoding(accept_encoding):
+    """依 Accept-Encoding 選擇壓縮方式：取 q 值最高者，同分時優先 br；q=0 表示拒絕，都不接受時返回 None"""
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress(body, encoding):
+    """以指定方式壓縮位元組"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+class FastJSONResponse(Response):
+    """跳過 Pydantic 驗證、直接序列化的 JSON 回應
+
+    內容必須已符合 response_model 的結構（由伺服器自己組出的資料）。
+    需要依 Accept-Encoding 壓縮時使用 create()，壓縮在執行緒池中進行，不會阻塞事件循環。
+    """
+    media_type = "application/json"
+
+    def __init__(self, content, status_code=200, headers=None, background=None, content_encoding=None):
+        """content 為要序列化的內容，或已序列化（及以 content_encoding 壓縮）的位元組"""
+        body = content if isinstance(content, bytes) else dumps(content)
+        if content_encoding:
+            headers = {**(headers or {}), "Content-Encoding": content_encoding}
+        super().__init__(body, status_code=status_code, headers=headers, background=background)
+
+    @classmethod
+    async def create(cls, content, accept_encoding=None, compress_min_size=COMPRESS_MIN_SIZE, headers=None, **kwargs):
+        """序列化內容，回應達 compress_min_size 且客戶端接受時壓縮為 br 或 gzip"""
+        body = dumps(content)
+        encoding = None
+        if len(body) >= compress_min_size:
+            headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+            encoding = choose_encoding(accept_encoding)
+            if encoding:
+                body = await run_in_threadpool(compress, body, encoding)
+        return cls(body, headers=headers, content_encoding=encoding, **kwargs)
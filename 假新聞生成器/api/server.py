@@ -1,108 +1,320 @@
-import logging
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-
-from core.generator import HeadlineGenerator
-from utils.metrics import track_api_usage
-
-logger = logging.getLogger(__name__)
-
-# 建立FastAPI應用
-app = FastAPI(
-    title="假新聞標題生成器API",
-    description="生成和管理假新聞標題的API服務",
-    version="1.0.0"
-)
-
-# 添加CORS中間件
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # 在生產環境中應限制來源
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# 請求模型
-class GenerateRequest(BaseModel):
-    count: int = Field(1, description="要生成的標題數量", ge=1, le=1000)
-    category: Optional[str] = Field(None, description="標題類別(如政治,科技)")
-    enhance: bool = Field(False, description="是否使用語言模型增強")
-
-class SearchRequest(BaseModel):
-    query: str = Field(..., description="搜索關鍵詞")
-    limit: int = Field(20, description="最大結果數", ge=1, le=100)
-
-# 回應模型
-class HeadlineResponse(BaseModel):
-    headline: str
-    category: str
-    created_at: str
-    keywords_used: Optional[Dict[str, str]] = None
-
-class GenerateResponse(BaseModel):
-    success: bool
-    count: int
-    headlines: List[HeadlineResponse]
-    execution_time: float
-
-# 依賴項
-def get_generator():
-    return HeadlineGenerator()
-
-# 路由
-@app.post("/generate", response_model=GenerateResponse)
-async def generate_headlines(
-    request: GenerateRequest,
-    background_tasks: BackgroundTasks,
-    generator: HeadlineGenerator = Depends(get_generator)
-):
-    """生成假新聞標題"""
-    import time
-    start_time = time.time()
-    
-    try:
-        results = generator.generate_headlines_batch(
-            count=request.count,
-            enhance_ratio=0.3 if request.enhance else 0
-        )
-        
-        # 處理回應格式
-        headlines = []
-        for result in results:
-            headlines.append({
-                "headline": result["headline"],
-                "category": result["category"],
-                "created_at": result["created_at"].isoformat(),
-                "keywords_used": result.get("keywords_used")
-            })
-        
-        execution_time = time.time() - start_time
-        
-        # 非阻塞地跟踪API使用情況
-        background_tasks.add_task(
-            track_api_usage,
-            endpoint="generate",
-            count=request.count,
-            execution_time=execution_time
-        )
-        
-        return {
-            "success": True,
-            "count": len(headlines),
-            "headlines": headlines,
-            "execution_time": execution_time
-        }
-        
-    except Exception as e:
-        logger.error(f"生成標題時發生錯誤: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"生成標題失敗: {str(e)}")
-
-# ... 其他API路由 ...
-
-# 啟動服務
-if __name__ == "__main__":
-    import uvicorn
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from api.headline_pool import HeadlinePool
+from api.models import GenerateRequest, GenerateResponse, SearchRequest, SearchResponse
+from api.rate_limit import Admission, AdmissionController, RateLimitExceeded, client_key
+from api.serialization import FastJSONResponse, dumps, headline_payload
+from core.generator import HeadlineGenerator, MicroBatchScorer, compile_template, get_scorer, set_scorer
+from core.keyword_manager import KeywordManager
+from core.template_engine import TemplateEngine
+from db.async_repository import AsyncHeadlineRepository
+from db.repository import TemplateRepository
+from utils.metrics import track_api_usage
+import config.settings as settings
+
+logger = logging.getLogger(__name__)
+
+API_CONFIG = getattr(settings, "API_CONFIG", {})  # 例如 {"api_keys": [...]}，未設定時依 IP 限流
+
+def _build_generator(base_scorer):
+    """建立共用的生成器並預熱模板、關鍵詞與評分模型
+
+    評分器換成 MicroBatchScorer，讓並發請求的困惑度計算合併成同一次前向傳播
+    """
+    scorer = MicroBatchScorer(base_scorer)
+    set_scorer(scorer)
+    generator = HeadlineGenerator()
+    template_categories = _warm_caches(generator)
+    scorer.load()
+    return generator, template_categories
+
+def _warm_caches(generator):
+    """載入生成器所用的模板快照，並把模板用到的關鍵詞類別讀入快取
+    
+    依型別在生成器的屬性中尋找 TemplateRepository 與 KeywordManager；
+    返回模板的類別集合，找不到模板倉庫時返回 None
+    """
+    components = list(vars(generator).values())
+    template_repositories = [c for c in components if isinstance(c, TemplateRepository)]
+    keyword_managers = [c for c in components if isinstance(c, KeywordManager)]
+    if not template_repositories and not keyword_managers:
+        logger.warning("生成器中找不到模板倉庫或關鍵詞管理器，略過快取預熱")
+        return None
+    
+    categories = set()
+    template_categories = set()
+    for repository in template_repositories:
+        for template_doc in repository.get_all_templates():
+            categories.update(compile_template(template_doc["template"])[1::2])
+            template_categories.add(TemplateEngine.normalize_category(template_doc.get("category")))
+    for manager in keyword_managers:
+        warmed = manager.warm_cache(categories)
+        logger.info(f"已預熱 {warmed}/{len(categories)} 個關鍵詞類別")
+    return template_categories if template_repositories else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """啟動時建立一次生成器與倉庫，所有請求共用；關閉時釋放連接"""
+    logger.info("正在預熱標題生成器...")
+    base_scorer = get_scorer()
+    app.state.generator, template_categories = await run_in_threadpool(_build_generator, base_scorer)
+    app.state.headline_repository = AsyncHeadlineRepository()
+    app.state.headline_pool = HeadlinePool(app.state.generator, known_categories=template_categories)
+    app.state.admission = AdmissionController(api_keys=API_CONFIG.get("api_keys"))
+    await app.state.headline_pool.start()
+    logger.info("標題生成器已就緒")
+    yield
+    await app.state.headline_pool.stop()
+    get_scorer().close()
+    set_scorer(base_scorer)  # 還原原本的評分器，同一行程再次啟動時不會重複包裝
+    app.state.headline_repository.db_manager.close()
+
+# 建立FastAPI應用
+app = FastAPI(
+    title="假新聞標題生成器API",
+    description="生成和管理假新聞標題的API服務",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# 添加CORS中間件
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # 在生產環境中應限制來源
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+# 依賴項（實例在 lifespan 中建立一次）
+def get_generator(request: Request):
+    return request.app.state.generator
+
+def get_headline_repository(request: Request):
+    return request.app.state.headline_repository
+
+def get_headline_pool(request: Request):
+    return request.app.state.headline_pool
+
+async def admit_generate(request: GenerateRequest, http_request: Request):
+    """依客戶端速率與全域並發額度決定是否受理生成請求，超出時回應 429"""
+    admission = http_request.app.state.admission
+    return admission.admit(client_key(http_request, admission.api_keys), request.count, request.enhance)
+
+GENERATE_MAX_EMPTY_BATCHES = 3  # 連續幾批都沒有新標題時不再補足，返回目前的結果
+
+# 路由
+@app.post("/generate", response_model=GenerateResponse)
+async def generate_headlines(
+    request: GenerateRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    generator: HeadlineGenerator = Depends(get_generator),
+    pool: HeadlinePool = Depends(get_headline_pool),
+    admission: Admission = Depends(admit_generate)
+):
+    """生成假新聞標題
+    
+    回應內容由伺服器自行組出、結構固定，因此直接以 FastJSONResponse 序列化（不經 Pydantic 驗證），
+    較大的回應依 Accept-Encoding 在執行緒池中壓縮；response_model 只用於文件。
+    """
+    import time
+    start_time = time.time()
+    
+    try:
+        # 不需增強時優先從預先生成的標題池取出
+        results = [] if request.enhance else pool.take(request.count, request.category)
+        seen = {result["headline"] for result in results}
+        
+        empty_batches = 0
+        while len(results) < request.count and empty_batches < GENERATE_MAX_EMPTY_BATCHES:
+            # 生成與評分是阻塞的 CPU 工作，放到執行緒池中避免卡住事件循環
+            batch = await run_in_threadpool(
+                generator.generate_headlines_batch,
+                count=request.count - len(results),
+                category=request.category,
+                enhance_ratio=0.3 if request.enhance else 0
+            )
+            if not batch:
+                break
+            # 與池中取出的標題去重，缺額在下一輪補足
+            added = 0
+            for result in batch:
+                if result["headline"] not in seen and len(results) < request.count:
+                    seen.add(result["headline"])
+                    results.append(result)
+                    added += 1
+            empty_batches = 0 if added else empty_batches + 1
+        
+        # 處理回應格式
+        headlines = [headline_payload(result) for result in results]
+        
+        execution_time = time.time() - start_time
+        
+        # 非阻塞地跟踪API使用情況
+        background_tasks.add_task(
+            track_api_usage,
+            endpoint="generate",
+            count=request.count,
+            execution_time=execution_time
+        )
+        
+        return await FastJSONResponse.create(
+            {
+                "success": True,
+                "count": len(headlines),
+                "headlines": headlines,
+                "execution_time": execution_time
+            },
+            accept_encoding=http_request.headers.get("accept-encoding")
+        )
+        
+    except Exception as e:
+        logger.error(f"生成標題時發生錯誤: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"生成標題失敗: {str(e)}")
+    
+    finally:
+        admission.release()
+
+STREAM_FIRST_CHUNK = 1   # 第一批只生成一個標題，讓首個結果盡快送出
+STREAM_MAX_CHUNK = 50    # 之後每批加倍，最多這麼多個
+STREAM_MAX_EMPTY_CHUNKS = 3  # 連續幾批都沒有新標題時放棄補足
+
+@app.post("/generate/stream")
+async def generate_headlines_stream(
+    request: GenerateRequest,
+    http_request: Request,
+    format: str = "ndjson",
+    generator: HeadlineGenerator = Depends(get_generator),
+    admission: Admission = Depends(admit_generate)
+):
+    """以 NDJSON 或 Server-Sent Events 逐筆串流生成的標題
+    
+    每批生成完成後才會生成下一批，客戶端讀得慢時生成也會跟著暫停；客戶端斷線時停止生成。
+    """
+    import time
+    if format not in ("ndjson", "sse"):
+        admission.release()
+        raise HTTPException(status_code=400, detail="format 必須是 ndjson 或 sse")
+    
+    start_time = time.time()
+    sent = {"count": 0}
+    
+    def frame(payload):
+        return b"data: " + payload + b"\n\n" if format == "sse" else payload + b"\n"
+    
+    async def stream():
+        chunk_size = STREAM_FIRST_CHUNK
+        seen = set()  # 跨批次去重，與 /generate 一樣不會送出重複標題
+        empty_chunks = 0
+        try:
+            while sent["count"] < request.count:
+                if await http_request.is_disconnected():
+                    logger.info(f"客戶端已斷線，停止串流 (已送出 {sent['count']} 筆)")
+                    return
+                
+                results = await run_in_threadpool(
+                    generator.generate_headlines_batch,
+                    count=min(chunk_size, request.count - sent["count"]),
+                    category=request.category,
+                    enhance_ratio=0.3 if request.enhance else 0
+                )
+                if not results:
+                    break
+                chunk_size = min(chunk_size * 2, STREAM_MAX_CHUNK)
+                
+                fresh = [result for result in results if result["headline"] not in seen]
+                if not fresh:
+                    # 整批都與已送出的重複：下一輪補足缺額，連續多批如此時結束
+                    empty_chunks += 1
+                    if empty_chunks >= STREAM_MAX_EMPTY_CHUNKS:
+                        logger.warning(f"串流無法再生成不重複的標題 (已送出 {sent['count']} 筆)")
+                        break
+                    continue
+                empty_chunks = 0
+                
+                for result in fresh:
+                    if result["headline"] in seen or sent["count"] >= request.count:
+                        continue
+                    seen.add(result["headline"])
+                    sent["count"] += 1
+                    yield frame(dumps(headline_payload(result)))
+            
+            if format == "sse":
+                yield b"event: end\n" + frame(dumps({"count": sent["count"]}))
+        
+        except Exception as e:
+            logger.error(f"串流生成標題時發生錯誤: {str(e)}")
+            error = dumps({"error": f"生成標題失敗: {str(e)}"})
+            yield b"event: error\n" + frame(error) if format == "sse" else frame(error)
+        
+        finally:
+            admission.release()
+    
+    def track_usage():
+        admission.release()  # 串流從未開始時（客戶端提早斷線）也要歸還額度
+        track_api_usage(endpoint="generate_stream", count=sent["count"], execution_time=time.time() - start_time)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(track_usage)
+    )
+
+@app.get("/metrics/pool")
+async def headline_pool_metrics(pool: HeadlinePool = Depends(get_headline_pool)):
+    """標題池的命中率、存量與補充延遲"""
+    return pool.stats()
+
+@app.get("/metrics/admission")
+async def admission_metrics(request: Request):
+    """准入控制的受理數、被拒數與目前並發權重"""
+    return request.app.state.admission.stats()
+
+@app.get("/metrics/scoring")
+async def scoring_metrics():
+    """困惑度微批次的請求數、批次數與平均批次大小"""
+    stats = get_scorer().stats
+    batches = stats["batches"]
+    return dict(stats, avg_batch_size=stats["sentences"] / batches if batches else 0.0)
+
+@app.post("/search", response_model=SearchResponse)
+async def search_headlines(
+    request: SearchRequest,
+    http_request: Request,
+    repository: AsyncHeadlineRepository = Depends(get_headline_repository)
+):
+    """全文搜索已保存的標題"""
+    try:
+        results = await repository.search_text(request.query, limit=request.limit)
+        headlines = [headline_payload(result) for result in results]
+        return await FastJSONResponse.create(
+            {"success": True, "count": len(headlines), "headlines": headlines},
+            accept_encoding=http_request.headers.get("accept-encoding")
+        )
+    
+    except Exception as e:
+        logger.error(f"搜索標題時發生錯誤: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"搜索標題失敗: {str(e)}")
+
+# ... 其他API路由 ...
+
+# 啟動服務
+if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,546 +1,1242 @@
-
-
-# -*- coding: utf-8 -*-
-
-import logging
-import random
-import torch
-from typing import Dict, List, Tuple
-from transformers import GPT2LMHeadModel, GPT2TokenizerFast
-
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"使用設備: {device}")
-
-
-tokenizer = GPT2TokenizerFast.from_pretrained("gpt2")
-model = GPT2LMHeadModel.from_pretrained("gpt2")
-
-model = model.to(device)
-model.eval()
-
-
-
-# 設定日誌
-logging.basicConfig(
-    level=logging.INFO,
-    encoding='utf-8',
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger('generator')
-
-class KeywordManager:
-    """管理關鍵詞（簡化版）"""
-    def __init__(self):
-        self.keywords = {
-            "人物": [
-                    "政府高官", "知名企業家", "國際明星", "資深記者", "著名科學家",
-                    "運動健將", "網紅主播", "影視導演", "慈善家", "知名律師",
-                  "音樂家", "藝術家", "環保人士", "社會活動家", "科技創業者"
-                  "退休將軍", "反對派領導人", "神秘富豪", "資深外交官", "前總統",
-                  "前首相", "知名作家", "社會名流", "網路紅人", "知名評論員"
-                   "知名醫生", "知名學者", "知名企業家", "知名投資人", "知名設計師",
-                   "知名運動員", "知名主持人", "知名網紅", "知名博主", "知名攝影師",
-                   "知名科學家", "知名演員", "知名歌手", "知名作曲家", "知名編劇",
-                   "知名導演", "知名藝術家", "知名舞者", "知名模特兒", "知名運動員",
-                   "知名教練", "知名裁判", "知名評論員", "知名分析師", "知名專家",
-                   "知名學者", "知名教授", "知名研究員", "知名科學家", "知名醫生",
-                   "知名律師", "知名會計師", "知名顧問", "知名策展人", "知名編輯",
-                   "知名記者", "知名攝影師", "知名設計師", "知名藝術家", "知名作家",
-                   "知名詩人", "知名小說家", "知名散文家", "知名劇作家", "知名漫畫家",
-                   "知名插畫家", "知名編劇", "知名導演", "知名製片人", "知名演員",
-                   "知名歌手", "知名舞者", "知名模特兒", "知名運動員", "知名教練",
-                   "知名裁判", "知名評論員", "知名分析師", "知名專家", "知名學者",
-                   "知名教授", "知名研究員", "知名科學家", "知名醫生", "知名律師",
-                   "知名會計師", "知名顧問", "知名策展人", "知名編輯", "知名記者",
-                   "知名攝影師", "知名設計師", "知名藝術家", "知名作家", "知名詩人",
-                    "知名小說家", "知名散文家", "知名劇作家", "知名漫畫家", "知名插畫家",
-                    "知名編劇", "知名導演", "知名製片人", "知名演員", "知名歌手",
-                    "知名舞者", "知名模特兒", "知名運動員", "知名教練", "知名裁判",
-                    "知名評論員", "知名分析師", "知名專家", "知名學者", "知名教授",
-                    "知名研究員", "知名科學家", "知名醫生", "知名律師", "知名會計師",
-                    "知名顧問", "知名策展人", "知名編輯", "知名記者", "知名攝影師",
-                    "知名設計師", "知名藝術家", "知名作家", "知名詩人", "知名小說家",
-                    "知名散文家", "知名劇作家", "知名漫畫家", "知名插畫家", "知名編劇",
-                    "知名導演", "知名製片人", "知名演員", "知名歌手", "知名舞者",
-                    "知名模特兒", "知名運動員", "知名教練", "知名裁判", "知名評論員",
-                    "知名分析師", "知名專家", "知名學者", "知名教授", "知名研究員",
-                    "知名科學家", "知名醫生", "知名律師", "知名會計師", "知名顧問"],
-
-            "事件": ["股市崩盤", "政府倒台", "明星出軌", "企業破產", "社會運動"
-                    "環保抗議", "科技創新", "醫療醜聞", "金融詐騙", "國際衝突",
-                    "網路攻擊", "恐怖襲擊", "自然災害", "政治醜聞", "經濟危機",
-                    "社會運動", "環保抗議", "科技創新", "醫療醜聞", "金融詐騙",
-                    "國際衝突", "網路攻擊", "恐怖襲擊", "自然災害", "政治醜聞",
-                    "經濟危機", "社會運動", "環保抗議", "科技創新", "醫療醜聞",
-                    "金融詐騙",
-                    ],
-            "國家": ["美國", "中國", "俄羅斯", "日本", "德國",
-                    "法國", "英國", "印度", "巴西", "南非",
-                    "韓國", "澳大利亞", "加拿大", "墨西哥", "阿根廷",
-                    "意大利", "西班牙", "瑞士", "瑞典", "挪威",
-                    "丹麥", "芬蘭", "荷蘭", "比利時", "奧地利",
-                    ],
-            "組織": ["聯合國", "世界衛生組織", "國際貨幣基金組織", "世界銀行", "北約",
-                    "歐盟", "國際奧委會", "國際紅十字會", "世界貿易組織", "國際刑警",
-                    "國際能源署", "國際原子能機構", "世界氣象組織", "國際電信聯盟", "世界知識產權組織",
-                    "國際民航組織", "國際海事組織", "國際勞工組織", "國際農業發展基金",
-                    "國際開發協會", "國際金融公司", "國際復興開發銀行", "國際投資銀行",
-                    "國際開發銀行", "國際經濟合作與發展組織", "國際貿易中心", "國際貨幣基金組織",
-
-                    ],
-
-            
-            "動作": ["簽署秘密協議", "洩露機密文件", "捐贈巨額資金", "突然辭職", "私下會晤"
-                    "發表爭議言論", "參加秘密會議", "接受調查", "發布警告", "進行突襲",
-                    "發起抗議", "提出訴訟", "發布聲明", "進行調查", "發起運動",
-                    "進行談判", "發布報告", "進行檢查", "發起競選", "進行演講",
-                    "發布公告", "進行調查", "發起運動", "進行談判", "發布報告"
-                    
-                    ],
-            "政策": ["經濟刺激計劃", "環保法案", "稅收改革", "醫療改革", "教育政策",
-                    "外交政策", "移民政策", "社會福利政策", "科技創新政策", "能源政策",
-                    "農業政策", "貿易政策", "國防政策", "公共安全政策", "城市發展政策",
-                    "文化政策", "體育政策", "交通運輸政策", "住房政策", "環境保護政策",
-                    "勞動政策", "社會保障政策", "金融政策", "貨幣政策", "投資政策",
-                    "科技政策", "創新政策", "數字經濟政策", "智慧城市政策", "綠色經濟政策",
-                    "可持續發展政策", "氣候變化政策", "生態保護政策", "資源管理政策",
-                    "生物多樣性政策", "水資源管理政策", "廢物管理政策", "空氣質量政策",
-                    "土壤保護政策", "生態系統服務政策", "環境影響評估政策", "環境監測政策",
-                    "環境教育政策", "環境法律政策", "環境管理政策", "環境技術政策",
-                    "環境經濟政策", "環境社會政策", "環境文化政策", "環境倫理政策",
-                    "環境科學政策", "環境技術政策", "環境管理政策", "環境經濟政策",
-                    
-                    ],
-          
-            "數字": ["10", "20", "30", "40", "50",
-                    "60", "70", "80", "90", "100",
-                    "200", "300", "400", "500", "600",
-                    "700", "800", "900", "1000", "2000",
-                    "3000", "4000", "5000", "6000", "7000",
-                    "8000", "9000", "10000", "20000", "30000",
-                    "40000", "50000", "60000", "70000", "80000",
-                    "90000", "100000", "200000", "300000", "400000",
-                    "500000", "600000", "700000", "800000", "900000",
-                    "1000000", "2000000", "3000000", "4000000", "5000000",
-
-                    ],
-            "反應": ["強烈譴責", "公開支持", "保持沉默", "發表聲明", "緊急會議",
-                    "發起抗議", "進行調查", "發布報告", "召開記者會", "發表評論",
-                    "進行談判", "發布公告", "召開會議", "發起運動", "進行檢查",
-                    "發布警告", "進行調查", "發起競選", "進行演講", "發布聲明",
-                    "召開會議", "發起抗議", "進行調查", "發布報告", "召開記者會",
-                    ],
-
-            "物品": ["毒品", "武器", "違禁品", "危險化學品", "生物武器",
-                    "核武器", "化學武器", "生化武器", "軍火", "毒品",
-                    "違禁藥物", "危險品", "爆炸物", "生物材料", "化學材料",
-                    "核材料", "放射性物質", "有毒物質", "危險廢物", "污染物",
-                    "有害物質", "危險化學品", "危險生物材料", "危險核材料",
-                    ],
-
-
-
-            
-            "結果": ["引發全國關注", "導致股市崩盤", "激起民眾抗議", "促使政府干預", "引起國際譴責"
-                    "引發外交危機", "導致經濟損失", "引起媒體熱議", "促使政策改變", "引發社會動盪",
-                    "導致人員傷亡", "引起國際關注", "導致國際制裁", "引發政治風波", "促使法律改革",
-                    "導致社會不安", "引起專家警告", "導致環境污染", "引發健康危機", "促使科技進步",
-                    "導致資源短缺", "引起經濟衰退", "導致社會分裂", "引發文化衝突", "促使國際合作",
-                    ],
-
-
-            "地點": ["北京", "華盛頓", "東京", "台北", "倫敦"
-                    "巴黎", "柏林", "莫斯科", "首爾", "新德里",
-                    "悉尼", "墨爾本", "多倫多", "巴西利亞", "布宜諾斯艾利斯",
-                    "開羅", "內羅畢", "約翰內斯堡", "新加坡", "吉隆坡",
-                    "曼谷", "雅加達", "河內", "胡志明市", "馬尼拉",
-                    "馬尼拉", "雅典", "羅馬", "馬德里", "布拉格",
-                    "布達佩斯", "維也納", "華沙", "布魯塞爾", "阿姆斯特丹",
-                    "哥本哈根", "斯德哥爾摩", "赫爾辛基", "奧斯陸", "雷克雅維克",
-                    "都柏林", "倫敦", "愛丁堡", "格拉斯哥", "曼徹斯特",
-                    "利物浦", "伯明翰", "布里斯托", "卡迪夫", "南安普敦",
-                    "諾丁漢", "謝菲爾德", "利茲", "哈德斯菲爾德", "巴斯",
-                    "劍橋", "牛津", "坎特伯雷", "巴斯", "布萊頓",
-                    "南安普敦", "朴茨茅斯", "哈羅蓋特", "約克", "利茲",
-                    "曼徹斯特", "伯明翰", "利物浦", "格拉斯哥", "愛丁堡",
-                    "阿伯丁", "邓迪", "斯特靈", "因弗內斯", "佩斯利",
-                    "格拉斯哥", "愛丁堡", "阿伯丁", "邓迪", "斯特靈",
-                    "因弗內斯", "佩斯利", "格拉斯哥", "愛丁堡", "阿伯丁",
-                    "邓迪", "斯特靈", "因弗內斯", "佩斯利", "格拉斯哥",
-                    "愛丁堡", "阿伯丁", "邓迪", "斯特靈", "因弗內斯",
-                    "佩斯利", "格拉斯哥", "愛丁堡", "阿伯丁", "邓迪",
-                    "斯特靈", "因弗內斯", "佩斯利", "格拉斯哥", "愛丁堡",
-                    ],
-
-            "文件": ["機密文件", "內部報告", "調查報告", "財務報表", "合約",
-                    "備忘錄", "電子郵件", "會議紀錄", "新聞稿", "公告",
-                    "聲明", "報告書", "研究報告", "計劃書", "預算案",
-                    "政策文件", "法律文件", "合同", "協議書", "備忘錄",
-                    "會議記錄", "新聞稿", "公告", "聲明", "報告書",
-                    ],
-                   
-
-            "機構": ["中央銀行", "國安局", "世界衛生組織", "聯合國", "外交部"
-                    "國防部", "環保署", "經濟部", "科技部", "教育部",
-                    "交通部", "文化部", "勞動部", "農業部", "衛生福利部",
-                    "內政部", "司法部", "財政部", "國土安全部", "商務部",
-                    "能源部", "國務院", "國際貨幣基金組織", "世界銀行",
-                    "世界貿易組織", "國際刑警組織", "國際原子能機構",
-                    "國際電信聯盟", "國際民航組織", "國際海事組織", "國際勞工組織",
-                    "國際農業發展基金", "國際開發協會", "國際金融公司",
-                    "國際復興開發銀行", "國際投資銀行", "國際開發銀行",
-                    "國際經濟合作與發展組織", "國際貿易中心", "國際貨幣基金組織",
-                    "國際能源署", "國際原子能機構", "國際電信聯盟", "國際民航組織",
-                    
-
-                    ],
-            "指控": ["貪污", "賄賂", "洗錢", "詐騙", "侵占公款",
-                    "濫用職權", "貪污受賄", "偽造文件", "竊取機密", "侵害人權",
-                    "違反國安法", "違反環保法", "違反勞動法", "違反稅法", "違反商業法",
-                    "違反金融法", "違反刑法", "違反民法", "違反行政法", "違反國際法",
-                    "違反人權法", "違反環境法", "違反消費者保護法", "違反智慧財產權法",
-                    ],
-            "症狀": ["頭痛", "發燒", "咳嗽", "噁心", "嘔吐",
-                       "腹瀉", "肌肉疼痛", "關節疼痛", "喉嚨痛", "流感",
-                        "過敏", "皮疹", "呼吸急促", "胸痛", "心悸",
-                        "乏力", "失眠", "焦慮", "抑鬱", "注意力不集中",
-                        "記憶力減退", "情緒波動", "食慾不振", "體重減輕", "體重增加",
-                        ],
-            "疾病": ["流感", "新冠肺炎", "糖尿病", "高血壓", "心臟病",
-                       "癌症", "中風", "阿茲海默症", "帕金森病", "關節炎",
-                        "哮喘", "過敏性鼻炎", "胃潰瘍", "肝炎", "腎衰竭",
-                        "肺結核", "艾滋病", "梅毒", "乙型肝炎", "丙型肝炎",
-                        "結核病", "麻疹", "腮腺炎", "水痘", "百日咳",
-                        ],
-            "爭議政策": ["稅收改革", "醫療改革", "環保法案", "移民政策", "教育政策",
-                    "外交政策", "社會福利政策", "科技創新政策", "能源政策", "農業政策",
-                    "貿易政策", "國防政策", "公共安全政策", "城市發展政策", "文化政策",
-                    "體育政策", "交通運輸政策", "住房政策", "環境保護政策", "勞動政策",
-                    "社會保障政策", "金融政策", "貨幣政策", "投資政策", "科技政策",
-                    ],
-            "動作": ["簽署協議", "發表演講", "進行調查", "發布報告", "召開會議",
-                    "進行談判", "發布聲明", "發起抗議", "進行檢查", "發布公告",
-                    "召開記者會", "發起運動", "進行演講", "發布警告", "進行調查",
-                    "發起競選", "進行演講", "發布聲明", "召開會議", "發起抗議",
-                    
-                    ],
-             "結果": ["引發全國關注", "導致股市崩盤", "激起民眾抗議", "促使政府干預", "引起國際譴責"
-                    "引發外交危機", "導致經濟損失", "引起媒體熱議", "促使政策改變", "引發社會動盪",
-                    "導致人員傷亡", "引起國際關注", "導致國際制裁", "引發政治風波", "促使法律改革",
-                    "導致社會不安", "引起專家警告", "導致環境污染", "引發健康危機", "促使科技進步",
-                    "導致資源短缺", "引起經濟衰退", "導致社會分裂", "引發文化衝突", "促使國際合作",
-
-                    ],
-
-             "關係":[   "合作", "對抗", "競爭", "友好", "敵對",
-                    "中立", "互惠", "互利", "互相支持", "互相抵制",
-                    "互相合作", "互相競爭", "互相對抗", "互相敵對", "互相中立",
-                    "互相友好", "互相合作", "互相支持", "互相抵制", "互相競爭",
-                    "互相對抗", "互相敵對", "互相中立", "互相友好", "互相合作",
-                    "情侶", "夫妻", "朋友", "同事", "同學",
-                    "鄰居", "親戚", "家人", "伴侶", "戀人",
-                   "兄弟", "姐妹", "父母", "子女", "祖父母",
-                    "孫子女", "叔叔", "阿姨", "舅舅", "姑姑",
-                        "表兄弟", "表姐妹", "堂兄弟", "堂姐妹", "親家",
-      
-                    ],
-
-              "公司": [
-                  "台積電", "鴻海", "聯發科", "華碩", "宏碁",
-                  "華為", "小米", "OPPO", "Vivo", "三星",
-                  "索尼", "LG", "HTC", "聯想", "戴爾",
-                  "惠普", "蘋果", "微軟", "谷歌", "亞馬遜",
-                  "臉書", "推特", "Instagram", "Snapchat", "Pinterest",
-                  "LinkedIn", "YouTube", "Netflix", "Spotify", "Uber",
-                  "LV", "Gucci", "Chanel", "Prada", "Dior",
-                  "Hermes", "Burberry", "Versace", "Armani", "Dolce & Gabbana",
-                  "Fendi", "Valentino", "Bulgari", "Cartier",
-                  "台塑", "中油", "中華電信", "台灣大哥大", "遠傳電信",
-                  "亞太電信", "台灣之星", "特斯拉", "蔚來", "小鵬",
-                  "理想", "比亞迪", "吉利", "長城", "廣汽", "奇瑞",
-                  "迪士尼", "環球影業", "華納兄弟", "索尼影業", "派拉蒙影業",
-                  "Hulu", "Amazon Prime Video", "Disney+", "Apple TV+",
-                  "Paramount+", "Starz", "Showtime", "BritBox", "Acorn TV",
-                  "Big hit", "Crunchyroll", "Funimation", "VRV", "HiDive",
-                  "AnimeLab", "Animelab", "Bilibili", "Tencent Video", "iQIYI",
-                  "Youku", "Mango TV", "Sohu Video", "LeTV", "PPTV",
-                  "Baidu Video", "Sina Video", "163 Video", "QQ Video", "Weibo",
-                  "富邦金控", "國泰金控", "台新金控", "永豐金控", "中信金控",
-                  "元大金控", "第一金控", "華南金控", "兆豐金控", "台灣銀行",
-                  "土地銀行", "合作金庫", "彰化銀行", "台中銀行", "高雄銀行",
-                  "高盛", "摩根士丹利", "美林證券", "瑞士信貸", "德意志銀行",
-                  "瑞士聯合銀行", "巴黎銀行", "荷蘭國際集團", "美聯儲", "美國銀行",
-                  "摩根大通", "花旗銀行", "富國銀行", "美國運通", "萬事達卡",
-                  "維薩卡", "Discover", "American Express", "Capital One",
-                  "Chase", "Bank of America", "Wells Fargo", "Citibank",
-                  "PNC Bank", "TD Bank", "US Bank", "SunTrust", "Regions Bank",
-                  "BB&T", "KeyBank", "Silvergate Bank", "Ally Bank", "Marcus by Goldman Sachs",
-                  "沃爾瑪", "家得寶", "Lowe's", "IKEA", "Ace Hardware",
-                  "Costco", "Target", "Kroger", "Ahold Delhaize", "Aldi",
-                  "Lidl", "Tesco", "Carrefour", "Metro", "7-Eleven",
-                  "Circle K", "Shell", "BP", "ExxonMobil", "Chevron",
-                  "Total", "ConocoPhillips", "Eni", "Repsol", "Petrobras",
-                  "Sinopec", "Toyota", "Honda", "Nissan", "Mazda",
-                  "Subaru", "Mitsubishi", "Suzuki", "Hyundai", "Kia",
-                  "Volkswagen", "Audi", "Porsche", "Rolls Royce", "Bentley",
-                  "McLaren", "Pagani", "Koenigsegg", "Trafigura", "Glencore",
-                  "Vitol", "Mercuria", "Gunvor",
-              ],
-                 
-             
-                "技術": ["人工智慧", "區塊鏈", "雲計算", "大數據", "物聯網",
-                        "虛擬實境", "擴增實境", "5G", "自駕車", "無人機",
-                        "量子計算", "邊緣計算", "生物技術", "基因編輯", "納米技術",
-                        "3D列印", "智能家居", "智能穿戴設備", "智能交通", "智能城市",
-                        "智能製造", "智能農業", "智能醫療", "智能物流", "智能能源",
-                        "智能環保", "智能安防", "智能金融", "智能教育", "智能娛樂",
-                        "DNA測序", "基因組學", "蛋白質組學", "代謝組學", "單細胞測序",
-                        "CRISPR技術", "基因編輯技術", "基因療法", "細胞療法", "免疫療法",
-                        "幹細胞療法", "基因診斷", "基因檢測", "基因組學研究", "蛋白質組學研究",
-                        "代謝組學研究", "單細胞測序研究", "基因編輯研究", "基因療法研究",
-                        "細胞療法研究", "免疫療法研究", "幹細胞療法研究", "基因診斷研究",
-                        "基因檢測研究", "基因組學技術", "蛋白質組學技術", "代謝組學技術",
-                        ],
-                
-                
-                
-        }        
-
-
-        
-    
-    def get_random_keyword(self, category: str) -> str:
-        return random.choice(self.keywords.get(category, [f"某{category}"]))
-
-class TemplateEngine:
-    """模板引擎（簡化版）"""
-    def __init__(self):
-        self.templates = [
-            {"template": "[人物]宣布[動作]，[結果]引發爭議", "category":"政治" },
-{"template": "[人物]被爆與[國家]密會，[機構]緊急介入調查", "category": "政治"},
-{"template": "[人物]宣布[政策]，專家警告將[結果]", "category": "政治"},
-{"template": "[國家]情報顯示：[人物]涉嫌[動作]，恐引發[結果]", "category": "政治"},
-{"template": "[人物]遭[機構]約談，疑與[事件]有關", "category": "政治"},
-{"template": "[人物]公開批評[政策]，[機構]強硬回應", "category": "政治"},
-{"template": "[人物]被揭露持有[資產]，[機構]要求解釋", "category": "政治"},
-{"template": "[人物]突然[動作]，[國家]緊急召開會議", "category": "政治"},
-{"template": "[人物]遭[國家]制裁，[機構]表態支持", "category": "政治"},
-{"template": "[人物]密訪[地點]，疑進行[動作]", "category": "政治"},
-{"template": "[人物]被爆收受[國家]資金，[機構]啟動調查", "category": "政治"},
-{"template": "[人物]宣布退出[組織]，[國家]回應「[反應]」", "category": "政治"},
-{"template": "[人物]遭[機構]指控[動作]，支持者抗議", "category": "政治"},
-{"template": "[人物]公開[文件]，內容震驚[行業]", "category": "政治"},
-{"template": "[人物]被爆與[人物]秘密合作，[機構]緊急澄清", "category": "政治"},
-{"template": "[人物]遭[國家]通緝，[機構]證實已[動作]", "category": "政治"},
-{"template": "[人物]宣布[政策]，[數字]%民眾反對", "category": "政治"},
-{"template": "[人物]被爆操控[事件]，[機構]介入調查", "category": "政治"},
-{"template": "[人物]遭[國家]驅逐，[機構]譴責「[反應]」", "category": "政治"},
-{"template": "[人物]公開支持[爭議政策]，[機構]強烈反彈", "category": "政治"},
-{"template": "[人物]宣布[動作]，[國家]威脅「[反應]」", "category": "政治"},
-{"template": "[人物]遭[機構]凍結資產，疑涉[事件]", "category": "政治"},
-{"template": "[人物]被爆與[國家]簽密約，[機構]否認", "category": "政治"},
-{"template": "[人物]突然[動作]，[國家]緊急應變", "category": "政治"},
-{"template": "[人物]遭[機構]起訴，罪名包括[指控]", "category": "政治"},
-{"template": "[人物]公開[文件]，[國家]回應「[反應]」", "category": "政治"},
-{"template": "[人物]被爆與[人物]密謀[事件]，[機構]介入", "category": "政治"},
-{"template": "[人物]宣布[政策]，[國家]揚言報復", "category": "政治"},
-{"template": "[人物]遭[機構]監控，疑涉[事件]", "category": "政治"},
-{"template": "[人物]被爆與[國家]交換[資產]，[機構]調查中", "category": "政治"},
-{"template": "[地點]驚傳[事件]，[人物]遭控[動作]", "category": "社會"},
-{"template": "[地點]爆發[事件]，[數字]人[結果]", "category": "社會"},
-{"template": "[地點]居民抗議[政策]，[機構]強制[動作]", "category": "社會"},
-{"template": "[地點]發現[物品]，專家警告恐[結果]", "category": "社會"},
-{"template": "[地點]驚現[現象]，[機構]緊急[動作]", "category": "社會"},
-{"template": "[地點]發生[事件]，目擊者：「[描述]」", "category": "社會"},
-{"template": "[地點]政府隱瞞[事件]，[人物]揭發真相", "category": "社會"},
-{"template": "[地點]民眾集體[動作]，[機構]介入鎮壓", "category": "社會"},
-{"template": "[地點]驚爆[事件]，[人物]遭逮捕", "category": "社會"},
-{"template": "[地點]出現[現象]，科學家無法解釋", "category": "社會"},
-{"template": "[地點]政府宣布[政策]，民眾怒批「[反應]」", "category": "社會"},
-{"template": "[地點]驚傳[事件]，[機構]證實[結果]", "category": "社會"},
-{"template": "[地點]居民集體[症狀]，疑與[物品]有關", "category": "社會"},
-{"template": "[地點]爆發[事件]，[人物]呼籲[動作]", "category": "社會"},
-{"template": "[地點]驚現[物品]，專家：恐導致[結果]", "category": "社會"},
-{"template": "[地點]政府隱瞞[事件]，[人物]洩露文件", "category": "社會"},
-{"template": "[地點]民眾抗議[政策]，[機構]強硬[動作]", "category": "社會"},
-{"template": "[地點]驚爆[事件]，[機構]緊急[動作]", "category": "社會"},
-{"template": "[地點]出現[現象]，[人物]警告「[反應]」", "category": "社會"},
-{"template": "[地點]政府宣布[政策]，[數字]%民眾反對", "category": "社會"},
-{"template": "[地點]驚傳[事件]，[機構]否認知情", "category": "社會"},
-{"template": "[地點]居民集體[症狀]，[機構]調查中", "category": "社會"},
-{"template": "[地點]爆發[事件]，[人物]要求[動作]", "category": "社會"},
-{"template": "[地點]驚現[物品]，[機構]警告勿[動作]", "category": "社會"},
-            
-{"template": "[機構]最新報告：[動作]將導致[結果]", "category": "經濟"},
-{"template": "[公司]宣布[動作]，[行業]股價[結果]", "category": "經濟"},
-{"template": "[機構]警告：[政策]將導致[行業][結果]", "category": "經濟"},
-{"template": "[公司]被爆[動作]，[數字]億資金蒸發", "category": "經濟"},
-{"template": "[行業]巨頭[公司]突宣布[動作]，市場震盪", "category": "經濟"},
-{"template": "[機構]報告：[行業]恐在[時間]內[結果]", "category": "經濟"},
-{"template": "[公司]遭[機構]調查，疑涉[事件]", "category": "經濟"},
-{"template": "[行業]驚傳[事件]，[公司]緊急[動作]", "category": "經濟"},
-{"template": "[公司]被爆與[國家]密約，[機構]介入", "category": "經濟"},
-{"template": "[行業]面臨[危機]，[公司]宣布[動作]", "category": "經濟"},
-{"template": "[機構]預測：[政策]將使[行業][結果]", "category": "經濟"},
-{"template": "[公司]突然[動作]，[數字]員工失業", "category": "經濟"},
-{"template": "[行業]遭[事件]衝擊，[公司]股價[結果]", "category": "經濟"},
-{"template": "[公司]被揭露[動作]，[機構]開罰[金額]", "category": "經濟"},
-{"template": "[行業]巨頭[公司]涉[事件]，[機構]調查", "category": "經濟"},
-{"template": "[公司]宣布[政策]，消費者怒批「[反應]」", "category": "經濟"},
-{"template": "[行業]驚爆[事件]，[公司]緊急切割", "category": "經濟"},
-{"template": "[機構]數據顯示：[行業]將[時間]內[結果]", "category": "經濟"},
-{"template": "[公司]遭[國家]制裁，[行業]連帶受創", "category": "經濟"},
-{"template": "[行業]面臨[危機]，[機構]呼籲[動作]", "category": "經濟"},
-{"template": "[公司]被爆[動作]，[數字]%市場受影響", "category": "經濟"},
-  
- 
-{"template": "[公司]發布[產品]，專家警告恐[結果]", "category": "科技"},
-{"template": "[機構]研究：[技術]可能導致[現象]", "category": "科技"},
-{"template": "[人物]宣布突破[技術]，[行業]震動", "category": "科技"},
-{"template": "[公司]被爆[動作]，用戶個資外洩", "category": "科技"},
-{"template": "[技術]實驗失控，[機構]緊急[動作]", "category": "科技"},
-{"template": "[公司]遭駭客攻擊，[數字]筆資料遭竊", "category": "科技"},
-{"template": "[人物]警告：[技術]恐引發[危機]", "category": "科技"},
-{"template": "[公司]隱瞞[事件]，[人物]揭發真相", "category": "科技,"},
-{"template": "[技術]遭濫用，[機構]呼籲立法管制", "category": "科技"},
-{"template": "[公司]宣布[產品]，[數字]國禁用", "category": "科技"},
-{"template": "[機構]發現：[技術]有[數字]%缺陷", "category": "科技"},
-{"template": "[人物]爆料：[公司]秘密研發[技術]", "category": "科技"},
-{"template": "[技術]實驗意外，[地點]緊急疏散", "category": "科技"},
-{"template": "[公司]被控操控[數據]，[機構]調查", "category": "科技"} ,   
-{"template": "[技術]突破，[人物]：將改變[行業]", "category": "科技"} ,
-            
-{"template": "獨家：[人物]被爆[動作]，[機構]緊急回應", "category": "娛樂"},
-{"template": "[明星]被爆[動作]，粉絲怒批「[反應]」", "category": "娛樂"},
-{"template": "[明星]與[明星]驚傳[關係]，經紀公司[反應]", "category": "娛樂"},
-{"template": "[明星]遭控[動作]，[機構]介入調查", "category": "娛樂"},
-{"template": "[明星]突然宣布[動作]，業界震驚", "category": "娛樂"},
-{"template": "[明星]被爆與[人物]密會，[反應]", "category": "娛樂"},
-{"template": "獨家：[人物]被爆[動作]，[機構]緊急回應", "category": "娛樂"},
-{"template": "[明星]新作涉[爭議]，[數字]%觀眾抵制", "category": "娛樂"},
-{"template": "[明星]遭[機構]封殺，疑因[事件]", "category": "娛樂"},
-{"template": "[明星]公開[言論]，[人物]怒批「[反應]」", "category": "娛樂"},
-{"template": "[明星]被揭露[動作]，[公司]切割", "category": "娛樂"},
-{"template": "[明星]驚傳[事件]，[機構]證實[結果]", "category": "娛樂"},
-{"template": "[明星]與[明星]被拍到[動作]，[機構]回應", "category": "娛樂"},
-{"template": "[明星]被爆[動作]，[數字]%粉絲抵制", "category": "娛樂"},
-{"template": "[明星]遭[機構]約談，疑涉[事件]", "category": "娛樂"},
-{"template": "[明星]公開[言論]，[數字]%網友支持", "category": "娛樂"},
-{"template": "[明星]被爆與[人物]密會，[機構]緊急澄清", "category": "娛樂"},
-        ]
-
-
-
-    def get_random_template(self) -> Tuple[str, str]:
-        template = random.choice(self.templates)
-        return template["template"], template["category"]
-    
-    def fill_template(self, template: str, keyword_manager: KeywordManager) -> Tuple[str, Dict]:
-        used_keywords = {}
-        while '[' in template:
-            start = template.index('[')
-            end = template.index(']')
-            category = template[start+1:end]
-            keyword = keyword_manager.get_random_keyword(category)
-            used_keywords[category] = keyword
-            template = template.replace(f"[{category}]", keyword, 1)
-        return template, used_keywords
-
-class FakeNewsGenerator:
-    """假新聞生成器核心類"""
-    def __init__(self):
-        self.template_engine = TemplateEngine()
-        self.keyword_manager = KeywordManager()
-        logger.info("假新聞生成器初始化完成")
-
-    def calculate_perplexity(self,sentence):
-        inputs = tokenizer(sentence, return_tensors="pt")
-        with torch.no_grad():
-            outputs = model(**inputs, labels=inputs["input_ids"])
-            loss = outputs.loss
-        return torch.exp(loss).item()
-    
-    def generate_headline(self) -> Dict:
-        """生成單個新聞標題"""
-        template, category = self.template_engine.get_random_template()
-        headline, used_keywords = self.template_engine.fill_template(template, self.keyword_manager)
-        return {
-            "headline": headline,
-            "category": category,
-            "keywords": used_keywords
-        }
-    
-    def generate_batch(self, count: int = 5) -> List[Dict]:
-        """批量生成標題"""
-        results = []
-        headlines_set = set()  # 使用集合來追蹤已生成的標題
-    
-        # 持續生成直到達到要求的數量
-        while len(results) < count:
-            news = self.generate_headline()
-            headline = news["headline"]
-        
-            # 只有當標題不重複時才添加到結果中
-            if headline not in headlines_set:
-                ppl = self.calculate_perplexity(headline)  # 計算困惑度
-                if ppl < 5:  # 你可以調整這個門檻
-                    # 儲存、印出、加入列表等
-                    headlines_set.add(headline)
-                    results.append(news)
-                else:
-                    # 加入set，遇到同樣不自然的，直接略過
-                    headlines_set.add(headline)
-                    pass
-                
-                
-    
-        return results
-       
-    def save_to_file(self, results: List[Dict], filename: str = "generated_headlines.txt") -> None:
-         """將生成的假新聞標題儲存到檔案中
-
-         Args:
-             results: 生成的假新聞標題列表
-             filename: 儲存的檔案名，預設為 "generated_headlines.txt"
-         """
-         try:
-             with open(filename, "w", encoding="utf-8") as file:
-                 for i, headline in enumerate(results, 1):
-                     output = f"{i}. {headline['headline']} ({headline['category']})"
-                     file.write(output + "\n")
-             logger.info(f"已成功將 {len(results)} 筆假新聞標題儲存到 {filename}")
-             print(f"生成的標題已儲存到 {filename}")
-         except Exception as e:
-             logger.error(f"儲存檔案時發生錯誤: {e}")
-             print(f"儲存檔案時發生錯誤: {e}")     
-
-
-    
-    
-    
-    
-    
-    
-
-
-if __name__ == "__main__":
-    generator = FakeNewsGenerator()
-    print("=== 假新聞標題生成器 ===")
-    
-    while True:
-        try:
-            num = int(input("請輸入要生成的標題數量 (0退出): "))
-            if num <= 0:
-                break
-            results = generator.generate_batch(num)
-            # 顯示生成的標題
-            for i, headline in enumerate(results, 1):
-                output = f"{i}. {headline['headline']} ({headline['category']})"
-                print(output)
-
-
-            # 儲存結果到檔案
-            generator.save_to_file(results)
-                                
-        except ValueError:
+
+
+# -*- coding: utf-8 -*-
+
+import logging
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+
+# 設定日誌
+logging.basicConfig(
+    level=logging.INFO,
+    encoding='utf-8',
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('generator')
+
+
+class PerplexityCache:
+    """標題 → 困惑度的有界 LRU 快取，可選擇以 SQLite 檔案持久化並跨行程共用
+
+    SQLite 檔案只以標題文字為鍵，不同模型請使用不同的檔案。
+    """
+    _SQL_CHUNK = 500  # 單次 IN 查詢的參數上限（SQLite 預設限制為 999）
+
+    def __init__(self, maxsize: int = 100000, db_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS perplexity (headline TEXT PRIMARY KEY, ppl REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, headline: str, ppl: float) -> None:
+        self._entries[headline] = ppl
+        self._entries.move_to_end(headline)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get_many(self, headlines: List[str]) -> Dict[str, float]:
+        """查詢多個標題，回傳命中的 {標題: 困惑度}"""
+        found = {}
+        with self._lock:
+            missing = []
+            for headline in headlines:
+                if headline in self._entries:
+                    self._entries.move_to_end(headline)
+                    found[headline] = self._entries[headline]
+                else:
+                    missing.append(headline)
+
+            if self._conn is not None and missing:
+                missing = list(dict.fromkeys(missing))
+                for start in range(0, len(missing), self._SQL_CHUNK):
+                    chunk = missing[start:start + self._SQL_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT headline, ppl FROM perplexity WHERE headline IN ({placeholders})", chunk
+                    ).fetchall()
+                    for headline, ppl in rows:
+                        found[headline] = ppl
+                        self._remember(headline, ppl)
+
+            self.hits += sum(1 for headline in headlines if headline in found)
+            self.misses += sum(1 for headline in headlines if headline not in found)
+        return found
+
+    def put_many(self, items: Dict[str, float]) -> None:
+        """寫入多個 {標題: 困惑度}"""
+        if not items:
+            return
+        with self._lock:
+            for headline, ppl in items.items():
+                self._remember(headline, ppl)
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO perplexity (headline, ppl) VALUES (?, ?)", items.items()
+                )
+                self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class PerplexityScorer:
+    """GPT-2 困惑度評分器，第一次評分時才載入模型"""
+    def __init__(self, model_name: str = "gpt2", batch_size: int = 32,
+                 cache: Optional[PerplexityCache] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size  # 每次前向傳播的句子數
+        self.cache = cache  # 為 None 時不快取
+        self.device = None
+        self.tokenizer = None
+        self.model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self) -> None:
+        """載入分詞器與模型（只會執行一次）"""
+        if self.model is not None:
+            return
+        with self._lock:
+            if self.model is not None:
+                return
+            import torch
+            from transformers import GPT2LMHeadModel, GPT2TokenizerFast
+
+            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            logger.info(f"載入語言模型 {self.model_name}，使用設備: {device}")
+            tokenizer = GPT2TokenizerFast.from_pretrained(self.model_name)
+            tokenizer.pad_token = tokenizer.eos_token  # GPT-2 沒有補齊符號，批量評分時以 eos 代替
+            model = GPT2LMHeadModel.from_pretrained(self.model_name).to(device)
+            model.eval()
+
+            self.device = device
+            self.tokenizer = tokenizer
+            self.model = model
+
+    def score(self, sentences: List[str], batch_size: Optional[int] = None) -> List[float]:
+        """批量計算困惑度，已快取的標題不會再經過模型
+
+        Args:
+            sentences: 待評分的標題列表
+            batch_size: 每個區塊的句子數（預設使用 self.batch_size）
+
+        Returns:
+            List[float]: 與輸入順序對應的困惑度
+        """
+        if not sentences:
+            return []
+        if self.cache is None:
+            return self._score_uncached(sentences, batch_size)
+
+        known = self.cache.get_many(sentences)
+        missing = [sentence for sentence in dict.fromkeys(sentences) if sentence not in known]
+        if missing:
+            scored = dict(zip(missing, self._score_uncached(missing, batch_size)))
+            self.cache.put_many(scored)
+            known.update(scored)
+        return [known[sentence] for sentence in sentences]
+
+    def _score_uncached(self, sentences: List[str], batch_size: Optional[int] = None) -> List[float]:
+        """每個區塊只做一次補齊後的前向傳播"""
+        self.load()
+        import torch
+
+        batch_size = batch_size or self.batch_size
+        perplexities = []
+        for start in range(0, len(sentences), batch_size):
+            chunk = sentences[start:start + batch_size]
+            inputs = self.tokenizer(chunk, return_tensors="pt", padding=True).to(self.device)
+            input_ids = inputs["input_ids"]
+            attention_mask = inputs["attention_mask"]
+            with torch.no_grad():
+                logits = self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+            # 與單句 labels=input_ids 的損失一致：預測下一個 token，忽略補齊位置
+            shift_logits = logits[:, :-1, :]
+            shift_labels = input_ids[:, 1:]
+            shift_mask = attention_mask[:, 1:].to(shift_logits.dtype)
+            token_loss = torch.nn.functional.cross_entropy(
+                shift_logits.transpose(1, 2), shift_labels, reduction="none"
+            )
+            token_count = shift_mask.sum(dim=1)
+            mean_loss = (token_loss * shift_mask).sum(dim=1) / token_count.clamp(min=1)
+            # 只有一個 token 的句子無法評分，視為不通過
+            mean_loss = mean_loss.masked_fill(token_count == 0, float("inf"))
+            perplexities.extend(torch.exp(mean_loss).tolist())
+        return perplexities
+
+
+_default_scorer = None
+_default_scorer_lock = threading.Lock()
+
+
+def get_scorer() -> PerplexityScorer:
+    """取得行程內共用的評分器（不會在此載入模型）"""
+    global _default_scorer
+    if _default_scorer is None:
+        with _default_scorer_lock:
+            if _default_scorer is None:
+                _default_scorer = PerplexityScorer(cache=PerplexityCache())
+    return _default_scorer
+
+
+def set_scorer(scorer) -> None:
+    """替換行程內共用的評分器（如換成 MicroBatchScorer），需在建立生成器之前呼叫"""
+    global _default_scorer
+    with _default_scorer_lock:
+        _default_scorer = scorer
+
+
+class MicroBatchScorer:
+    """合併多個執行緒同時送來的評分請求，湊成一批後只做一次前向傳播
+
+    第一個請求到達後最多等待 max_wait 秒，或累積到 max_batch 句就送出；
+    對外介面與 PerplexityScorer 相同，可直接作為 FakeNewsGenerator 的 scorer。
+    """
+    def __init__(self, scorer: PerplexityScorer, max_batch: Optional[int] = None, max_wait: float = 0.005):
+        if isinstance(scorer, MicroBatchScorer):
+            scorer = scorer.scorer  # 不重複包裝，直接合併到底層評分器
+        self.scorer = scorer
+        self.max_batch = max_batch or scorer.batch_size
+        self.max_wait = max_wait
+        self.stats = {"requests": 0, "batches": 0, "sentences": 0}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.scorer.loaded
+
+    def load(self) -> None:
+        self.scorer.load()
+
+    def submit(self, sentences: List[str]) -> Future:
+        """送出評分請求，返回結果為困惑度列表的 Future"""
+        future = Future()
+        if not sentences:
+            future.set_result([])
+            return future
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._batch_loop, name="micro-batch-scorer", daemon=True)
+                    self._thread.start()
+        self._queue.put((list(sentences), future))
+        return future
+
+    def score(self, sentences: List[str], batch_size: Optional[int] = None) -> List[float]:
+        """阻塞直到評分完成（batch_size 由合併後的批次決定，此參數僅為相容而保留）"""
+        return self.submit(sentences).result()
+
+    async def score_async(self, sentences: List[str]) -> List[float]:
+        import asyncio
+
+        return await asyncio.wrap_future(self.submit(sentences))
+
+    def close(self) -> None:
+        """處理完佇列中的請求後停止背景執行緒"""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def _batch_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            pending = [item]
+            size = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            sentences = [sentence for batch, _ in pending for sentence in batch]
+            try:
+                scores = self.scorer.score(sentences)
+            except Exception as e:
+                logger.error(f"批次評分失敗: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(pending)
+            self.stats["batches"] += 1
+            self.stats["sentences"] += len(sentences)
+            offset = 0
+            for batch, future in pending:
+                future.set_result(scores[offset:offset + len(batch)])
+                offset += len(batch)
+
+
+class AliasTable:
+    """Walker 別名表（Vose 建表法）：O(n) 建表，每次加權抽樣 O(1)"""
+    def __init__(self, weights):
+        weights = [float(w) for w in weights]
+        total = sum(weights)
+        if not weights or total <= 0 or min(weights) < 0:
+            raise ValueError("權重必須非負且總和大於 0")
+        size = len(weights)
+        scaled = [w * size / total for w in weights]
+        prob = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # 剩下的欄位（含浮點誤差殘留）機率為 1
+        self.size = size
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+        self._arrays = None
+
+    def sample(self) -> int:
+        u = random.random() * self.size
+        i = min(int(u), self.size - 1)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample_array(self, rng, size: int):
+        """以 numpy.random.Generator 一次抽出 size 個索引"""
+        import numpy as np
+
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.prob), np.asarray(self.alias))
+        prob, alias = self._arrays
+        columns = rng.integers(0, self.size, size=size)
+        return np.where(rng.random(size) < prob[columns], columns, alias[columns])
+
+
+class KeywordManager:
+    """管理關鍵詞（簡化版）"""
+    def __init__(self):
+        self.keywords = {
+            "人物": [
+                    "政府高官", "知名企業家", "國際明星", "資深記者", "著名科學家",
+                    "運動健將", "網紅主播", "影視導演", "慈善家", "知名律師",
+                  "音樂家", "藝術家", "環保人士", "社會活動家", "科技創業者",
+                  "退休將軍", "反對派領導人", "神秘富豪", "資深外交官", "前總統",
+                  "前首相", "知名作家", "社會名流", "網路紅人", "知名評論員",
+                   "知名醫生", "知名學者", "知名企業家", "知名投資人", "知名設計師",
+                   "知名運動員", "知名主持人", "知名網紅", "知名博主", "知名攝影師",
+                   "知名科學家", "知名演員", "知名歌手", "知名作曲家", "知名編劇",
+                   "知名導演", "知名藝術家", "知名舞者", "知名模特兒", "知名運動員",
+                   "知名教練", "知名裁判", "知名評論員", "知名分析師", "知名專家",
+                   "知名學者", "知名教授", "知名研究員", "知名科學家", "知名醫生",
+                   "知名律師", "知名會計師", "知名顧問", "知名策展人", "知名編輯",
+                   "知名記者", "知名攝影師", "知名設計師", "知名藝術家", "知名作家",
+                   "知名詩人", "知名小說家", "知名散文家", "知名劇作家", "知名漫畫家",
+                   "知名插畫家", "知名編劇", "知名導演", "知名製片人", "知名演員",
+                   "知名歌手", "知名舞者", "知名模特兒", "知名運動員", "知名教練",
+                   "知名裁判", "知名評論員", "知名分析師", "知名專家", "知名學者",
+                   "知名教授", "知名研究員", "知名科學家", "知名醫生", "知名律師",
+                   "知名會計師", "知名顧問", "知名策展人", "知名編輯", "知名記者",
+                   "知名攝影師", "知名設計師", "知名藝術家", "知名作家", "知名詩人",
+                    "知名小說家", "知名散文家", "知名劇作家", "知名漫畫家", "知名插畫家",
+                    "知名編劇", "知名導演", "知名製片人", "知名演員", "知名歌手",
+                    "知名舞者", "知名模特兒", "知名運動員", "知名教練", "知名裁判",
+                    "知名評論員", "知名分析師", "知名專家", "知名學者", "知名教授",
+                    "知名研究員", "知名科學家", "知名醫生", "知名律師", "知名會計師",
+                    "知名顧問", "知名策展人", "知名編輯", "知名記者", "知名攝影師",
+                    "知名設計師", "知名藝術家", "知名作家", "知名詩人", "知名小說家",
+                    "知名散文家", "知名劇作家", "知名漫畫家", "知名插畫家", "知名編劇",
+                    "知名導演", "知名製片人", "知名演員", "知名歌手", "知名舞者",
+                    "知名模特兒", "知名運動員", "知名教練", "知名裁判", "知名評論員",
+                    "知名分析師", "知名專家", "知名學者", "知名教授", "知名研究員",
+                    "知名科學家", "知名醫生", "知名律師", "知名會計師", "知名顧問"],
+
+            "事件": ["股市崩盤", "政府倒台", "明星出軌", "企業破產", "社會運動",
+                    "環保抗議", "科技創新", "醫療醜聞", "金融詐騙", "國際衝突",
+                    "網路攻擊", "恐怖襲擊", "自然災害", "政治醜聞", "經濟危機",
+                    "社會運動", "環保抗議", "科技創新", "醫療醜聞", "金融詐騙",
+                    "國際衝突", "網路攻擊", "恐怖襲擊", "自然災害", "政治醜聞",
+                    "經濟危機", "社會運動", "環保抗議", "科技創新", "醫療醜聞",
+                    "金融詐騙",
+                    ],
+            "國家": ["美國", "中國", "俄羅斯", "日本", "德國",
+                    "法國", "英國", "印度", "巴西", "南非",
+                    "韓國", "澳大利亞", "加拿大", "墨西哥", "阿根廷",
+                    "意大利", "西班牙", "瑞士", "瑞典", "挪威",
+                    "丹麥", "芬蘭", "荷蘭", "比利時", "奧地利",
+                    ],
+            "組織": ["聯合國", "世界衛生組織", "國際貨幣基金組織", "世界銀行", "北約",
+                    "歐盟", "國際奧委會", "國際紅十字會", "世界貿易組織", "國際刑警",
+                    "國際能源署", "國際原子能機構", "世界氣象組織", "國際電信聯盟", "世界知識產權組織",
+                    "國際民航組織", "國際海事組織", "國際勞工組織", "國際農業發展基金",
+                    "國際開發協會", "國際金融公司", "國際復興開發銀行", "國際投資銀行",
+                    "國際開發銀行", "國際經濟合作與發展組織", "國際貿易中心", "國際貨幣基金組織",
+
+                    ],
+
+            
+            "動作": ["簽署秘密協議", "洩露機密文件", "捐贈巨額資金", "突然辭職", "私下會晤",
+                    "發表爭議言論", "參加秘密會議", "接受調查", "發布警告", "進行突襲",
+                    "發起抗議", "提出訴訟", "發布聲明", "進行調查", "發起運動",
+                    "進行談判", "發布報告", "進行檢查", "發起競選", "進行演講",
+                    "發布公告", "進行調查", "發起運動", "進行談判", "發布報告"
+                    
+                    ],
+            "政策": ["經濟刺激計劃", "環保法案", "稅收改革", "醫療改革", "教育政策",
+                    "外交政策", "移民政策", "社會福利政策", "科技創新政策", "能源政策",
+                    "農業政策", "貿易政策", "國防政策", "公共安全政策", "城市發展政策",
+                    "文化政策", "體育政策", "交通運輸政策", "住房政策", "環境保護政策",
+                    "勞動政策", "社會保障政策", "金融政策", "貨幣政策", "投資政策",
+                    "科技政策", "創新政策", "數字經濟政策", "智慧城市政策", "綠色經濟政策",
+                    "可持續發展政策", "氣候變化政策", "生態保護政策", "資源管理政策",
+                    "生物多樣性政策", "水資源管理政策", "廢物管理政策", "空氣質量政策",
+                    "土壤保護政策", "生態系統服務政策", "環境影響評估政策", "環境監測政策",
+                    "環境教育政策", "環境法律政策", "環境管理政策", "環境技術政策",
+                    "環境經濟政策", "環境社會政策", "環境文化政策", "環境倫理政策",
+                    "環境科學政策", "環境技術政策", "環境管理政策", "環境經濟政策",
+                    
+                    ],
+          
+            "數字": ["10", "20", "30", "40", "50",
+                    "60", "70", "80", "90", "100",
+                    "200", "300", "400", "500", "600",
+                    "700", "800", "900", "1000", "2000",
+                    "3000", "4000", "5000", "6000", "7000",
+                    "8000", "9000", "10000", "20000", "30000",
+                    "40000", "50000", "60000", "70000", "80000",
+                    "90000", "100000", "200000", "300000", "400000",
+                    "500000", "600000", "700000", "800000", "900000",
+                    "1000000", "2000000", "3000000", "4000000", "5000000",
+
+                    ],
+            "反應": ["強烈譴責", "公開支持", "保持沉默", "發表聲明", "緊急會議",
+                    "發起抗議", "進行調查", "發布報告", "召開記者會", "發表評論",
+                    "進行談判", "發布公告", "召開會議", "發起運動", "進行檢查",
+                    "發布警告", "進行調查", "發起競選", "進行演講", "發布聲明",
+                    "召開會議", "發起抗議", "進行調查", "發布報告", "召開記者會",
+                    ],
+
+            "物品": ["毒品", "武器", "違禁品", "危險化學品", "生物武器",
+                    "核武器", "化學武器", "生化武器", "軍火", "毒品",
+                    "違禁藥物", "危險品", "爆炸物", "生物材料", "化學材料",
+                    "核材料", "放射性物質", "有毒物質", "危險廢物", "污染物",
+                    "有害物質", "危險化學品", "危險生物材料", "危險核材料",
+                    ],
+
+
+
+            
+            "結果": ["引發全國關注", "導致股市崩盤", "激起民眾抗議", "促使政府干預", "引起國際譴責",
+                    "引發外交危機", "導致經濟損失", "引起媒體熱議", "促使政策改變", "引發社會動盪",
+                    "導致人員傷亡", "引起國際關注", "導致國際制裁", "引發政治風波", "促使法律改革",
+                    "導致社會不安", "引起專家警告", "導致環境污染", "引發健康危機", "促使科技進步",
+                    "導致資源短缺", "引起經濟衰退", "導致社會分裂", "引發文化衝突", "促使國際合作",
+                    ],
+
+
+            "地點": ["北京", "華盛頓", "東京", "台北", "倫敦",
+                    "巴黎", "柏林", "莫斯科", "首爾", "新德里",
+                    "悉尼", "墨爾本", "多倫多", "巴西利亞", "布宜諾斯艾利斯",
+                    "開羅", "內羅畢", "約翰內斯堡", "新加坡", "吉隆坡",
+                    "曼谷", "雅加達", "河內", "胡志明市", "馬尼拉",
+                    "馬尼拉", "雅典", "羅馬", "馬德里", "布拉格",
+                    "布達佩斯", "維也納", "華沙", "布魯塞爾", "阿姆斯特丹",
+                    "哥本哈根", "斯德哥爾摩", "赫爾辛基", "奧斯陸", "雷克雅維克",
+                    "都柏林", "倫敦", "愛丁堡", "格拉斯哥", "曼徹斯特",
+                    "利物浦", "伯明翰", "布里斯托", "卡迪夫", "南安普敦",
+                    "諾丁漢", "謝菲爾德", "利茲", "哈德斯菲爾德", "巴斯",
+                    "劍橋", "牛津", "坎特伯雷", "巴斯", "布萊頓",
+                    "南安普敦", "朴茨茅斯", "哈羅蓋特", "約克", "利茲",
+                    "曼徹斯特", "伯明翰", "利物浦", "格拉斯哥", "愛丁堡",
+                    "阿伯丁", "邓迪", "斯特靈", "因弗內斯", "佩斯利",
+                    "格拉斯哥", "愛丁堡", "阿伯丁", "邓迪", "斯特靈",
+                    "因弗內斯", "佩斯利", "格拉斯哥", "愛丁堡", "阿伯丁",
+                    "邓迪", "斯特靈", "因弗內斯", "佩斯利", "格拉斯哥",
+                    "愛丁堡", "阿伯丁", "邓迪", "斯特靈", "因弗內斯",
+                    "佩斯利", "格拉斯哥", "愛丁堡", "阿伯丁", "邓迪",
+                    "斯特靈", "因弗內斯", "佩斯利", "格拉斯哥", "愛丁堡",
+                    ],
+
+            "文件": ["機密文件", "內部報告", "調查報告", "財務報表", "合約",
+                    "備忘錄", "電子郵件", "會議紀錄", "新聞稿", "公告",
+                    "聲明", "報告書", "研究報告", "計劃書", "預算案",
+                    "政策文件", "法律文件", "合同", "協議書", "備忘錄",
+                    "會議記錄", "新聞稿", "公告", "聲明", "報告書",
+                    ],
+                   
+
+            "機構": ["中央銀行", "國安局", "世界衛生組織", "聯合國", "外交部",
+                    "國防部", "環保署", "經濟部", "科技部", "教育部",
+                    "交通部", "文化部", "勞動部", "農業部", "衛生福利部",
+                    "內政部", "司法部", "財政部", "國土安全部", "商務部",
+                    "能源部", "國務院", "國際貨幣基金組織", "世界銀行",
+                    "世界貿易組織", "國際刑警組織", "國際原子能機構",
+                    "國際電信聯盟", "國際民航組織", "國際海事組織", "國際勞工組織",
+                    "國際農業發展基金", "國際開發協會", "國際金融公司",
+                    "國際復興開發銀行", "國際投資銀行", "國際開發銀行",
+                    "國際經濟合作與發展組織", "國際貿易中心", "國際貨幣基金組織",
+                    "國際能源署", "國際原子能機構", "國際電信聯盟", "國際民航組織",
+                    
+
+                    ],
+            "指控": ["貪污", "賄賂", "洗錢", "詐騙", "侵占公款",
+                    "濫用職權", "貪污受賄", "偽造文件", "竊取機密", "侵害人權",
+                    "違反國安法", "違反環保法", "違反勞動法", "違反稅法", "違反商業法",
+                    "違反金融法", "違反刑法", "違反民法", "違反行政法", "違反國際法",
+                    "違反人權法", "違反環境法", "違反消費者保護法", "違反智慧財產權法",
+                    ],
+            "症狀": ["頭痛", "發燒", "咳嗽", "噁心", "嘔吐",
+                       "腹瀉", "肌肉疼痛", "關節疼痛", "喉嚨痛", "流感",
+                        "過敏", "皮疹", "呼吸急促", "胸痛", "心悸",
+                        "乏力", "失眠", "焦慮", "抑鬱", "注意力不集中",
+                        "記憶力減退", "情緒波動", "食慾不振", "體重減輕", "體重增加",
+                        ],
+            "疾病": ["流感", "新冠肺炎", "糖尿病", "高血壓", "心臟病",
+                       "癌症", "中風", "阿茲海默症", "帕金森病", "關節炎",
+                        "哮喘", "過敏性鼻炎", "胃潰瘍", "肝炎", "腎衰竭",
+                        "肺結核", "艾滋病", "梅毒", "乙型肝炎", "丙型肝炎",
+                        "結核病", "麻疹", "腮腺炎", "水痘", "百日咳",
+                        ],
+            "爭議政策": ["稅收改革", "醫療改革", "環保法案", "移民政策", "教育政策",
+                    "外交政策", "社會福利政策", "科技創新政策", "能源政策", "農業政策",
+                    "貿易政策", "國防政策", "公共安全政策", "城市發展政策", "文化政策",
+                    "體育政策", "交通運輸政策", "住房政策", "環境保護政策", "勞動政策",
+                    "社會保障政策", "金融政策", "貨幣政策", "投資政策", "科技政策",
+                    ],
+            "動作": ["簽署協議", "發表演講", "進行調查", "發布報告", "召開會議",
+                    "進行談判", "發布聲明", "發起抗議", "進行檢查", "發布公告",
+                    "召開記者會", "發起運動", "進行演講", "發布警告", "進行調查",
+                    "發起競選", "進行演講", "發布聲明", "召開會議", "發起抗議",
+                    
+                    ],
+             "結果": ["引發全國關注", "導致股市崩盤", "激起民眾抗議", "促使政府干預", "引起國際譴責",
+                    "引發外交危機", "導致經濟損失", "引起媒體熱議", "促使政策改變", "引發社會動盪",
+                    "導致人員傷亡", "引起國際關注", "導致國際制裁", "引發政治風波", "促使法律改革",
+                    "導致社會不安", "引起專家警告", "導致環境污染", "引發健康危機", "促使科技進步",
+                    "導致資源短缺", "引起經濟衰退", "導致社會分裂", "引發文化衝突", "促使國際合作",
+
+                    ],
+
+             "關係":[   "合作", "對抗", "競爭", "友好", "敵對",
+                    "中立", "互惠", "互利", "互相支持", "互相抵制",
+                    "互相合作", "互相競爭", "互相對抗", "互相敵對", "互相中立",
+                    "互相友好", "互相合作", "互相支持", "互相抵制", "互相競爭",
+                    "互相對抗", "互相敵對", "互相中立", "互相友好", "互相合作",
+                    "情侶", "夫妻", "朋友", "同事", "同學",
+                    "鄰居", "親戚", "家人", "伴侶", "戀人",
+                   "兄弟", "姐妹", "父母", "子女", "祖父母",
+                    "孫子女", "叔叔", "阿姨", "舅舅", "姑姑",
+                        "表兄弟", "表姐妹", "堂兄弟", "堂姐妹", "親家",
+      
+                    ],
+
+              "公司": [
+                  "台積電", "鴻海", "聯發科", "華碩", "宏碁",
+                  "華為", "小米", "OPPO", "Vivo", "三星",
+                  "索尼", "LG", "HTC", "聯想", "戴爾",
+                  "惠普", "蘋果", "微軟", "谷歌", "亞馬遜",
+                  "臉書", "推特", "Instagram", "Snapchat", "Pinterest",
+                  "LinkedIn", "YouTube", "Netflix", "Spotify", "Uber",
+                  "LV", "Gucci", "Chanel", "Prada", "Dior",
+                  "Hermes", "Burberry", "Versace", "Armani", "Dolce & Gabbana",
+                  "Fendi", "Valentino", "Bulgari", "Cartier",
+                  "台塑", "中油", "中華電信", "台灣大哥大", "遠傳電信",
+                  "亞太電信", "台灣之星", "特斯拉", "蔚來", "小鵬",
+                  "理想", "比亞迪", "吉利", "長城", "廣汽", "奇瑞",
+                  "迪士尼", "環球影業", "華納兄弟", "索尼影業", "派拉蒙影業",
+                  "Hulu", "Amazon Prime Video", "Disney+", "Apple TV+",
+                  "Paramount+", "Starz", "Showtime", "BritBox", "Acorn TV",
+                  "Big hit", "Crunchyroll", "Funimation", "VRV", "HiDive",
+                  "AnimeLab", "Animelab", "Bilibili", "Tencent Video", "iQIYI",
+                  "Youku", "Mango TV", "Sohu Video", "LeTV", "PPTV",
+                  "Baidu Video", "Sina Video", "163 Video", "QQ Video", "Weibo",
+                  "富邦金控", "國泰金控", "台新金控", "永豐金控", "中信金控",
+                  "元大金控", "第一金控", "華南金控", "兆豐金控", "台灣銀行",
+                  "土地銀行", "合作金庫", "彰化銀行", "台中銀行", "高雄銀行",
+                  "高盛", "摩根士丹利", "美林證券", "瑞士信貸", "德意志銀行",
+                  "瑞士聯合銀行", "巴黎銀行", "荷蘭國際集團", "美聯儲", "美國銀行",
+                  "摩根大通", "花旗銀行", "富國銀行", "美國運通", "萬事達卡",
+                  "維薩卡", "Discover", "American Express", "Capital One",
+                  "Chase", "Bank of America", "Wells Fargo", "Citibank",
+                  "PNC Bank", "TD Bank", "US Bank", "SunTrust", "Regions Bank",
+                  "BB&T", "KeyBank", "Silvergate Bank", "Ally Bank", "Marcus by Goldman Sachs",
+                  "沃爾瑪", "家得寶", "Lowe's", "IKEA", "Ace Hardware",
+                  "Costco", "Target", "Kroger", "Ahold Delhaize", "Aldi",
+                  "Lidl", "Tesco", "Carrefour", "Metro", "7-Eleven",
+                  "Circle K", "Shell", "BP", "ExxonMobil", "Chevron",
+                  "Total", "ConocoPhillips", "Eni", "Repsol", "Petrobras",
+                  "Sinopec", "Toyota", "Honda", "Nissan", "Mazda",
+                  "Subaru", "Mitsubishi", "Suzuki", "Hyundai", "Kia",
+                  "Volkswagen", "Audi", "Porsche", "Rolls Royce", "Bentley",
+                  "McLaren", "Pagani", "Koenigsegg", "Trafigura", "Glencore",
+                  "Vitol", "Mercuria", "Gunvor",
+              ],
+                 
+             
+                "技術": ["人工智慧", "區塊鏈", "雲計算", "大數據", "物聯網",
+                        "虛擬實境", "擴增實境", "5G", "自駕車", "無人機",
+                        "量子計算", "邊緣計算", "生物技術", "基因編輯", "納米技術",
+                        "3D列印", "智能家居", "智能穿戴設備", "智能交通", "智能城市",
+                        "智能製造", "智能農業", "智能醫療", "智能物流", "智能能源",
+                        "智能環保", "智能安防", "智能金融", "智能教育", "智能娛樂",
+                        "DNA測序", "基因組學", "蛋白質組學", "代謝組學", "單細胞測序",
+                        "CRISPR技術", "基因編輯技術", "基因療法", "細胞療法", "免疫療法",
+                        "幹細胞療法", "基因診斷", "基因檢測", "基因組學研究", "蛋白質組學研究",
+                        "代謝組學研究", "單細胞測序研究", "基因編輯研究", "基因療法研究",
+                        "細胞療法研究", "免疫療法研究", "幹細胞療法研究", "基因診斷研究",
+                        "基因檢測研究", "基因組學技術", "蛋白質組學技術", "代謝組學技術",
+                        ],
+                
+                
+                
+        }        
+        self.weights = {}  # 類別 -> 與關鍵詞對應的權重，未設定時均勻抽樣
+        self.alias_tables = {}  # 類別 -> AliasTable，只在權重變更時重建
+        self.load_report = {}
+        self.load_keywords(self.keywords)
+
+
+        
+    
+    def load_keywords(self, keywords: Dict[str, List[str]],
+                      weights: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Dict]:
+        """正規化並載入關鍵詞表：去除空白與重複、字串駐留，並以 tuple 儲存
+
+        Args:
+            keywords: 類別 -> 關鍵詞列表
+            weights: 類別 -> {關鍵詞: 權重}，未列出的關鍵詞權重為 1
+
+        Returns:
+            Dict[str, Dict]: 每個類別的載入報告 (總數、保留數、被丟棄的重複詞)
+        """
+        weights = weights or {}
+        tables = {}
+        table_weights = {}
+        report = {}
+        for category, words in keywords.items():
+            category = sys.intern(category.strip())
+            unique = {}
+            dropped = []
+            for word in words:
+                word = word.strip()
+                if not word:
+                    continue
+                if word in unique:
+                    dropped.append(word)
+                    continue
+                unique[sys.intern(word)] = None
+            tables[category] = tuple(unique)
+            report[category] = {"total": len(words), "kept": len(unique), "dropped": dropped}
+
+            category_weights = weights.get(category)
+            if category_weights:
+                table_weights[category] = tuple(float(category_weights.get(word, 1.0)) for word in tables[category])
+
+        self.keywords = tables
+        self.weights = table_weights
+        self.alias_tables = {category: AliasTable(w) for category, w in table_weights.items()}
+        self.load_report = report
+        dropped_total = sum(len(r["dropped"]) for r in report.values())
+        logger.info(f"載入 {len(tables)} 個關鍵詞類別，共 {sum(map(len, tables.values()))} 個關鍵詞，丟棄 {dropped_total} 個重複詞")
+        return report
+
+    def set_weights(self, category: str, weights: Optional[Dict[str, float]]) -> None:
+        """設定（或以 None 清除）單一類別的關鍵詞權重，並重建其別名表"""
+        if not weights:
+            self.weights.pop(category, None)
+            self.alias_tables.pop(category, None)
+            return
+        table_weights = tuple(float(weights.get(word, 1.0)) for word in self.keywords.get(category, ()))
+        self.alias_tables[category] = AliasTable(table_weights)
+        self.weights[category] = table_weights
+
+    def get_weights(self, category: str) -> Optional[Tuple[float, ...]]:
+        return self.weights.get(category)
+
+    def get_alias_table(self, category: str) -> Optional[AliasTable]:
+        return self.alias_tables.get(category)
+
+    def get_random_keyword(self, category: str) -> str:
+        words = self.keywords.get(category) or (f"某{category}",)
+        alias_table = self.alias_tables.get(category)
+        if alias_table is not None:
+            return words[alias_table.sample()]
+        return random.choice(words)
+
+_PLACEHOLDER_PATTERN = re.compile(r'\[(.*?)\]')
+
+
+def compile_template(template: str) -> Tuple[str, ...]:
+    """將模板預先切分為片段：偶數位置為固定文字，奇數位置為佔位符類別"""
+    return tuple(_PLACEHOLDER_PATTERN.split(template))
+
+
+class IndexPermutation:
+    """[0, size) 上的偽隨機雙射（Feistel 網路 + cycle walking），不需額外記憶體"""
+    _MASK64 = 0xFFFFFFFFFFFFFFFF
+
+    def __init__(self, size: int, seed: Optional[int] = None, rounds: int = 4):
+        if size <= 0:
+            raise ValueError("排列大小必須為正數")
+        self.size = size
+        # 取不小於 size 的偶數位元寬度，左右各一半
+        bits = max(2, (size - 1).bit_length())
+        bits += bits % 2
+        self._half_bits = bits // 2
+        self._half_mask = (1 << self._half_bits) - 1
+        key_source = random.Random(seed)
+        self._keys = [key_source.getrandbits(64) for _ in range(rounds)]
+
+    def _round(self, value: int, key: int) -> int:
+        x = ((value ^ key) * 0x9E3779B97F4A7C15) & self._MASK64
+        x ^= x >> 29
+        x = (x * 0xBF58476D1CE4E5B9) & self._MASK64
+        x ^= x >> 32
+        return x & self._half_mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half_bits, value & self._half_mask
+        for key in self._keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self._half_bits) | right
+
+    def __call__(self, index: int) -> int:
+        if not 0 <= index < self.size:
+            raise IndexError(f"索引超出範圍: {index}")
+        value = self._encrypt(index)
+        while value >= self.size:  # 值域比 size 大時重複加密直到落回範圍內
+            value = self._encrypt(value)
+        return value
+
+
+class TemplateEngine:
+    """模板引擎（簡化版）"""
+    def __init__(self):
+        self.templates = [
+            {"template": "[人物]宣布[動作]，[結果]引發爭議", "category":"政治" },
+{"template": "[人物]被爆與[國家]密會，[機構]緊急介入調查", "category": "政治"},
+{"template": "[人物]宣布[政策]，專家警告將[結果]", "category": "政治"},
+{"template": "[國家]情報顯示：[人物]涉嫌[動作]，恐引發[結果]", "category": "政治"},
+{"template": "[人物]遭[機構]約談，疑與[事件]有關", "category": "政治"},
+{"template": "[人物]公開批評[政策]，[機構]強硬回應", "category": "政治"},
+{"template": "[人物]被揭露持有[資產]，[機構]要求解釋", "category": "政治"},
+{"template": "[人物]突然[動作]，[國家]緊急召開會議", "category": "政治"},
+{"template": "[人物]遭[國家]制裁，[機構]表態支持", "category": "政治"},
+{"template": "[人物]密訪[地點]，疑進行[動作]", "category": "政治"},
+{"template": "[人物]被爆收受[國家]資金，[機構]啟動調查", "category": "政治"},
+{"template": "[人物]宣布退出[組織]，[國家]回應「[反應]」", "category": "政治"},
+{"template": "[人物]遭[機構]指控[動作]，支持者抗議", "category": "政治"},
+{"template": "[人物]公開[文件]，內容震驚[行業]", "category": "政治"},
+{"template": "[人物]被爆與[人物]秘密合作，[機構]緊急澄清", "category": "政治"},
+{"template": "[人物]遭[國家]通緝，[機構]證實已[動作]", "category": "政治"},
+{"template": "[人物]宣布[政策]，[數字]%民眾反對", "category": "政治"},
+{"template": "[人物]被爆操控[事件]，[機構]介入調查", "category": "政治"},
+{"template": "[人物]遭[國家]驅逐，[機構]譴責「[反應]」", "category": "政治"},
+{"template": "[人物]公開支持[爭議政策]，[機構]強烈反彈", "category": "政治"},
+{"template": "[人物]宣布[動作]，[國家]威脅「[反應]」", "category": "政治"},
+{"template": "[人物]遭[機構]凍結資產，疑涉[事件]", "category": "政治"},
+{"template": "[人物]被爆與[國家]簽密約，[機構]否認", "category": "政治"},
+{"template": "[人物]突然[動作]，[國家]緊急應變", "category": "政治"},
+{"template": "[人物]遭[機構]起訴，罪名包括[指控]", "category": "政治"},
+{"template": "[人物]公開[文件]，[國家]回應「[反應]」", "category": "政治"},
+{"template": "[人物]被爆與[人物]密謀[事件]，[機構]介入", "category": "政治"},
+{"template": "[人物]宣布[政策]，[國家]揚言報復", "category": "政治"},
+{"template": "[人物]遭[機構]監控，疑涉[事件]", "category": "政治"},
+{"template": "[人物]被爆與[國家]交換[資產]，[機構]調查中", "category": "政治"},
+{"template": "[地點]驚傳[事件]，[人物]遭控[動作]", "category": "社會"},
+{"template": "[地點]爆發[事件]，[數字]人[結果]", "category": "社會"},
+{"template": "[地點]居民抗議[政策]，[機構]強制[動作]", "category": "社會"},
+{"template": "[地點]發現[物品]，專家警告恐[結果]", "category": "社會"},
+{"template": "[地點]驚現[現象]，[機構]緊急[動作]", "category": "社會"},
+{"template": "[地點]發生[事件]，目擊者：「[描述]」", "category": "社會"},
+{"template": "[地點]政府隱瞞[事件]，[人物]揭發真相", "category": "社會"},
+{"template": "[地點]民眾集體[動作]，[機構]介入鎮壓", "category": "社會"},
+{"template": "[地點]驚爆[事件]，[人物]遭逮捕", "category": "社會"},
+{"template": "[地點]出現[現象]，科學家無法解釋", "category": "社會"},
+{"template": "[地點]政府宣布[政策]，民眾怒批「[反應]」", "category": "社會"},
+{"template": "[地點]驚傳[事件]，[機構]證實[結果]", "category": "社會"},
+{"template": "[地點]居民集體[症狀]，疑與[物品]有關", "category": "社會"},
+{"template": "[地點]爆發[事件]，[人物]呼籲[動作]", "category": "社會"},
+{"template": "[地點]驚現[物品]，專家：恐導致[結果]", "category": "社會"},
+{"template": "[地點]政府隱瞞[事件]，[人物]洩露文件", "category": "社會"},
+{"template": "[地點]民眾抗議[政策]，[機構]強硬[動作]", "category": "社會"},
+{"template": "[地點]驚爆[事件]，[機構]緊急[動作]", "category": "社會"},
+{"template": "[地點]出現[現象]，[人物]警告「[反應]」", "category": "社會"},
+{"template": "[地點]政府宣布[政策]，[數字]%民眾反對", "category": "社會"},
+{"template": "[地點]驚傳[事件]，[機構]否認知情", "category": "社會"},
+{"template": "[地點]居民集體[症狀]，[機構]調查中", "category": "社會"},
+{"template": "[地點]爆發[事件]，[人物]要求[動作]", "category": "社會"},
+{"template": "[地點]驚現[物品]，[機構]警告勿[動作]", "category": "社會"},
+            
+{"template": "[機構]最新報告：[動作]將導致[結果]", "category": "經濟"},
+{"template": "[公司]宣布[動作]，[行業]股價[結果]", "category": "經濟"},
+{"template": "[機構]警告：[政策]將導致[行業][結果]", "category": "經濟"},
+{"template": "[公司]被爆[動作]，[數字]億資金蒸發", "category": "經濟"},
+{"template": "[行業]巨頭[公司]突宣布[動作]，市場震盪", "category": "經濟"},
+{"template": "[機構]報告：[行業]恐在[時間]內[結果]", "category": "經濟"},
+{"template": "[公司]遭[機構]調查，疑涉[事件]", "category": "經濟"},
+{"template": "[行業]驚傳[事件]，[公司]緊急[動作]", "category": "經濟"},
+{"template": "[公司]被爆與[國家]密約，[機構]介入", "category": "經濟"},
+{"template": "[行業]面臨[危機]，[公司]宣布[動作]", "category": "經濟"},
+{"template": "[機構]預測：[政策]將使[行業][結果]", "category": "經濟"},
+{"template": "[公司]突然[動作]，[數字]員工失業", "category": "經濟"},
+{"template": "[行業]遭[事件]衝擊，[公司]股價[結果]", "category": "經濟"},
+{"template": "[公司]被揭露[動作]，[機構]開罰[金額]", "category": "經濟"},
+{"template": "[行業]巨頭[公司]涉[事件]，[機構]調查", "category": "經濟"},
+{"template": "[公司]宣布[政策]，消費者怒批「[反應]」", "category": "經濟"},
+{"template": "[行業]驚爆[事件]，[公司]緊急切割", "category": "經濟"},
+{"template": "[機構]數據顯示：[行業]將[時間]內[結果]", "category": "經濟"},
+{"template": "[公司]遭[國家]制裁，[行業]連帶受創", "category": "經濟"},
+{"template": "[行業]面臨[危機]，[機構]呼籲[動作]", "category": "經濟"},
+{"template": "[公司]被爆[動作]，[數字]%市場受影響", "category": "經濟"},
+  
+ 
+{"template": "[公司]發布[產品]，專家警告恐[結果]", "category": "科技"},
+{"template": "[機構]研究：[技術]可能導致[現象]", "category": "科技"},
+{"template": "[人物]宣布突破[技術]，[行業]震動", "category": "科技"},
+{"template": "[公司]被爆[動作]，用戶個資外洩", "category": "科技"},
+{"template": "[技術]實驗失控，[機構]緊急[動作]", "category": "科技"},
+{"template": "[公司]遭駭客攻擊，[數字]筆資料遭竊", "category": "科技"},
+{"template": "[人物]警告：[技術]恐引發[危機]", "category": "科技"},
+{"template": "[公司]隱瞞[事件]，[人物]揭發真相", "category": "科技"},
+{"template": "[技術]遭濫用，[機構]呼籲立法管制", "category": "科技"},
+{"template": "[公司]宣布[產品]，[數字]國禁用", "category": "科技"},
+{"template": "[機構]發現：[技術]有[數字]%缺陷", "category": "科技"},
+{"template": "[人物]爆料：[公司]秘密研發[技術]", "category": "科技"},
+{"template": "[技術]實驗意外，[地點]緊急疏散", "category": "科技"},
+{"template": "[公司]被控操控[數據]，[機構]調查", "category": "科技"} ,   
+{"template": "[技術]突破，[人物]：將改變[行業]", "category": "科技"} ,
+            
+{"template": "獨家：[人物]被爆[動作]，[機構]緊急回應", "category": "娛樂"},
+{"template": "[明星]被爆[動作]，粉絲怒批「[反應]」", "category": "娛樂"},
+{"template": "[明星]與[明星]驚傳[關係]，經紀公司[反應]", "category": "娛樂"},
+{"template": "[明星]遭控[動作]，[機構]介入調查", "category": "娛樂"},
+{"template": "[明星]突然宣布[動作]，業界震驚", "category": "娛樂"},
+{"template": "[明星]被爆與[人物]密會，[反應]", "category": "娛樂"},
+{"template": "[明星]新作涉[爭議]，[數字]%觀眾抵制", "category": "娛樂"},
+{"template": "[明星]遭[機構]封殺，疑因[事件]", "category": "娛樂"},
+{"template": "[明星]公開[言論]，[人物]怒批「[反應]」", "category": "娛樂"},
+{"template": "[明星]被揭露[動作]，[公司]切割", "category": "娛樂"},
+{"template": "[明星]驚傳[事件]，[機構]證實[結果]", "category": "娛樂"},
+{"template": "[明星]與[明星]被拍到[動作]，[機構]回應", "category": "娛樂"},
+{"template": "[明星]被爆[動作]，[數字]%粉絲抵制", "category": "娛樂"},
+{"template": "[明星]遭[機構]約談，疑涉[事件]", "category": "娛樂"},
+{"template": "[明星]公開[言論]，[數字]%網友支持", "category": "娛樂"},
+{"template": "[明星]被爆與[人物]密會，[機構]緊急澄清", "category": "娛樂"},
+        ]
+        self.load_templates(self.templates)
+
+
+
+    def load_templates(self, templates: List[Dict]) -> None:
+        """載入模板，並重建預編譯片段與加權抽樣用的別名表
+
+        模板可帶有 "weight" 欄位（預設 1），全部權重相同時使用均勻抽樣。
+        """
+        self.templates = templates
+        # 載入時一次編譯所有模板，填充時只需要拼接片段
+        self.plans = {t["template"]: compile_template(t["template"]) for t in templates}
+        weights = [t.get("weight", 1.0) for t in templates]
+        self.alias_table = AliasTable(weights) if len(set(weights)) > 1 else None
+
+    def get_random_template(self) -> Tuple[str, str]:
+        if self.alias_table is not None:
+            template = self.templates[self.alias_table.sample()]
+        else:
+            template = random.choice(self.templates)
+        return template["template"], template["category"]
+
+    def get_plan(self, template: str) -> Tuple[str, ...]:
+        plan = self.plans.get(template)
+        if plan is None:
+            plan = self.plans[template] = compile_template(template)
+        return plan
+    
+    def fill_template(self, template: str, keyword_manager: KeywordManager) -> Tuple[str, Dict]:
+        used_keywords = {}
+        parts = list(self.get_plan(template))
+        for i in range(1, len(parts), 2):
+            category = parts[i]
+            keyword = keyword_manager.get_random_keyword(category)
+            used_keywords[category] = keyword
+            parts[i] = keyword
+        return "".join(parts), used_keywords
+
+class FakeNewsGenerator:
+    """假新聞生成器核心類"""
+    def __init__(self, perplexity_threshold: float = 5, score_batch_size: int = 32, oversample: float = 2.0,
+                 filter_perplexity: bool = True, scorer=None,
+                 seen_filter=None):
+        self.template_engine = TemplateEngine()
+        self.keyword_manager = KeywordManager()
+        self.perplexity_threshold = perplexity_threshold  # 困惑度門檻，低於此值才保留
+        self.score_batch_size = score_batch_size  # 每次前向傳播的句子數
+        self.oversample = oversample  # 每輪候選數 = 缺額 × oversample
+        self.filter_perplexity = filter_perplexity  # 關閉時完全不載入模型
+        self.attempts_per_headline = 100  # 未指定 max_attempts 時，每個標題可用的候選數
+        self._scorer = scorer
+        # 跨批次的去重過濾器（如 db.dedup.HeadlineDeduplicator），需提供 might_contain / add
+        self.seen_filter = seen_filter
+        self._rng = None  # generate_bulk 使用的 numpy 亂數來源，第一次使用時建立
+        self._combinations = None  # 組合空間索引，見 build_combinations
+        logger.info("假新聞生成器初始化完成")
+
+    @property
+    def scorer(self) -> PerplexityScorer:
+        if self._scorer is None:
+            self._scorer = get_scorer()
+        return self._scorer
+
+    def calculate_perplexity(self,sentence):
+        return self.calculate_perplexities([sentence])[0]
+
+    def calculate_perplexities(self, sentences: List[str]) -> List[float]:
+        """批量計算困惑度（見 PerplexityScorer.score）"""
+        return self.scorer.score(sentences, batch_size=self.score_batch_size)
+    
+    def generate_headline(self) -> Dict:
+        """生成單個新聞標題"""
+        template, category = self.template_engine.get_random_template()
+        headline, used_keywords = self.template_engine.fill_template(template, self.keyword_manager)
+        return {
+            "headline": headline,
+            "category": category,
+            "keywords": used_keywords
+        }
+
+    def generate_bulk(self, count: int, include_keywords: bool = True, rng=None) -> List[Dict]:
+        """一次抽樣大量標題：以 NumPy 陣列抽出模板與關鍵詞索引，再依模板分組拼接
+
+        Args:
+            count: 要生成的標題數量（可能包含重複）
+            include_keywords: 是否附上使用的關鍵詞字典
+            rng: numpy.random.Generator，預設使用生成器自己的亂數來源
+
+        Returns:
+            List[Dict]: 與 generate_headline 相同格式的標題列表
+        """
+        import numpy as np
+
+        if count <= 0:
+            return []
+        if rng is None:
+            if self._rng is None:
+                self._rng = np.random.default_rng()
+            rng = self._rng
+
+        templates = self.template_engine.templates
+        if self.template_engine.alias_table is not None:
+            template_ids = self.template_engine.alias_table.sample_array(rng, count)
+        else:
+            template_ids = rng.integers(0, len(templates), size=count)
+        results = [None] * count
+        for template_id in np.unique(template_ids):
+            positions = np.flatnonzero(template_ids == template_id).tolist()
+            template = templates[template_id]["template"]
+            category = templates[template_id]["category"]
+            plan = self.template_engine.get_plan(template)
+            slots = plan[1::2]
+            fmt = "{}".join(part.replace("{", "{{").replace("}", "}}") for part in plan[0::2])
+
+            # 每個佔位符一次抽出所有索引
+            columns = []
+            for slot in slots:
+                words = self.keyword_manager.keywords.get(slot) or (f"某{slot}",)
+                alias_table = self.keyword_manager.get_alias_table(slot)
+                if alias_table is not None:
+                    picks = alias_table.sample_array(rng, len(positions)).tolist()
+                else:
+                    picks = rng.integers(0, len(words), size=len(positions)).tolist()
+                columns.append([words[i] for i in picks])
+
+            for position, words in zip(positions, zip(*columns) if columns else [()] * len(positions)):
+                results[position] = {
+                    "headline": fmt.format(*words),
+                    "category": category,
+                    "keywords": dict(zip(slots, words)) if include_keywords else None
+                }
+        return results
+    
+    def _mark_seen(self, accepted: List[Dict]) -> None:
+        if self.seen_filter is not None:
+            for news in accepted:
+                self.seen_filter.add(news["headline"])
+
+    def build_combinations(self) -> int:
+        """建立組合空間索引（模板或關鍵詞變更後需重新呼叫）
+
+        每個模板的組合數為其各佔位符關鍵詞數量的乘積，整個空間依模板順序串接；
+        文字相同的模板只計入一次，確保不同索引解碼出的標題不重複。
+
+        Returns:
+            int: 組合總數
+        """
+        offsets = []
+        spaces = []
+        total = 0
+        seen_templates = set()
+        for template_info in self.template_engine.templates:
+            if template_info["template"] in seen_templates:
+                continue
+            seen_templates.add(template_info["template"])
+            plan = self.template_engine.get_plan(template_info["template"])
+            slots = plan[1::2]
+            words = [self.keyword_manager.keywords.get(slot) or (f"某{slot}",) for slot in slots]
+            size = 1
+            for slot_words in words:
+                size *= len(slot_words)
+            offsets.append(total)
+            spaces.append((template_info, plan, slots, words))
+            total += size
+        self._combinations = (offsets, spaces, total)
+        return total
+
+    def total_combinations(self) -> int:
+        if self._combinations is None:
+            self.build_combinations()
+        return self._combinations[2]
+
+    def headline_at(self, index: int) -> Dict:
+        """將 [0, total_combinations) 中的整數以混合進位解碼為唯一的標題"""
+        total = self.total_combinations()
+        if not 0 <= index < total:
+            raise IndexError(f"組合索引超出範圍: {index} (共 {total} 種)")
+        offsets, spaces, _ = self._combinations
+        position = bisect_right(offsets, index) - 1
+        template_info, plan, slots, words = spaces[position]
+
+        # 以最後一個佔位符為最低位進行混合進位解碼
+        local = index - offsets[position]
+        picks = [None] * len(slots)
+        for i in range(len(slots) - 1, -1, -1):
+            local, digit = divmod(local, len(words[i]))
+            picks[i] = words[i][digit]
+
+        parts = list(plan)
+        parts[1::2] = picks
+        return {
+            "headline": "".join(parts),
+            "category": template_info["category"],
+            "keywords": dict(zip(slots, picks))
+        }
+
+    def enumerate_headlines(self, start: int = 0, stop: Optional[int] = None,
+                            seed: Optional[int] = None, shuffle: bool = True) -> Iterator[Dict]:
+        """不放回地依序產生 [start, stop) 範圍內的標題，保證不重複
+
+        使用相同 seed 的多個工作者可各自取不相交的 [start, stop) 來分割組合空間。
+
+        Args:
+            start: 起始序號
+            stop: 結束序號（不含），預設為組合總數
+            seed: 排列種子，shuffle=False 時忽略
+            shuffle: 是否以偽隨機排列打亂順序
+
+        Yields:
+            Dict: 與 generate_headline 相同格式的標題
+        """
+        total = self.total_combinations()
+        stop = total if stop is None else min(stop, total)
+        if start >= stop:
+            return
+        permutation = IndexPermutation(total, seed) if shuffle else None
+        for i in range(start, stop):
+            yield self.headline_at(permutation(i) if permutation else i)
+
+    def generate_batch(self, count: int = 5, max_attempts: Optional[int] = None,
+                       timeout: Optional[float] = None) -> List[Dict]:
+        """批量生成標題（預算用盡時可能少於 count，見 generate_batch_with_stats）"""
+        results, _ = self.generate_batch_with_stats(count, max_attempts=max_attempts, timeout=timeout)
+        return results
+
+    def generate_batch_with_stats(self, count: int = 5, max_attempts: Optional[int] = None,
+                                  timeout: Optional[float] = None) -> Tuple[List[Dict], Dict]:
+        """在嘗試次數與時間預算內批量生成標題，並回傳統計資訊
+
+        Args:
+            count: 要生成的標題數量
+            max_attempts: 最多生成的候選數（含重複），預設為 count × attempts_per_headline
+            timeout: 最長執行秒數，None 表示不限時間
+
+        Returns:
+            Tuple[List[Dict], Dict]: (標題列表, 統計資訊)
+        """
+        if max_attempts is None:
+            max_attempts = count * self.attempts_per_headline
+        start_time = time.perf_counter()
+        deadline = start_time + timeout if timeout is not None else None
+
+        stats = {
+            "requested": count,
+            "generated": 0,    # 生成的候選數（含重複）
+            "duplicates": 0,   # 重複而略過的候選數
+            "seen_before": 0,  # 被 seen_filter 判定為以前生成過的候選數
+            "rejected": 0,     # 困惑度未達門檻的候選數
+            "accepted": 0,     # 加入結果的標題數
+            "fill_time": 0.0,  # 生成候選所花的秒數
+            "score_time": 0.0, # 計算困惑度所花的秒數
+            "elapsed": 0.0,
+            "acceptance_rate": 0.0,
+            "stop_reason": "completed",
+        }
+        results = []
+        headlines_set = set()  # 使用集合來追蹤已生成的標題
+
+        # 持續生成直到達到要求的數量或用盡預算
+        while len(results) < count:
+            if stats["generated"] >= max_attempts:
+                stats["stop_reason"] = "max_attempts"
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                stats["stop_reason"] = "timeout"
+                break
+
+            # 先多生成一批不重複的候選，再分塊一次評分；不過濾時只生成缺額，避免丟棄候選
+            shortfall = count - len(results)
+            target = max(1, int(shortfall * self.oversample)) if self.filter_perplexity else shortfall
+            candidates = []
+            fill_start = time.perf_counter()
+            while len(candidates) < target and stats["generated"] < max_attempts:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                draws = min(target - len(candidates), max_attempts - stats["generated"])
+                for news in self.generate_bulk(draws):
+                    stats["generated"] += 1
+                    headline = news["headline"]
+                    if headline in headlines_set:
+                        stats["duplicates"] += 1
+                        continue
+                    # 不論是否通過都加入set，遇到同樣的標題直接略過
+                    headlines_set.add(headline)
+                    if self.seen_filter is not None and self.seen_filter.might_contain(headline):
+                        stats["seen_before"] += 1
+                        continue
+                    candidates.append(news)
+            stats["fill_time"] += time.perf_counter() - fill_start
+
+            if not self.filter_perplexity:
+                accepted = candidates[:count - len(results)]
+                results.extend(accepted)
+                stats["accepted"] += len(accepted)
+                self._mark_seen(accepted)
+                continue
+
+            # 每 score_batch_size 個候選評分一次，之間檢查時間預算，避免單次評分遠超過 timeout
+            for start in range(0, len(candidates), self.score_batch_size):
+                if len(results) >= count:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    stats["stop_reason"] = "timeout"
+                    break
+                chunk = candidates[start:start + self.score_batch_size]
+                score_start = time.perf_counter()
+                perplexities = self.calculate_perplexities([news["headline"] for news in chunk])
+                stats["score_time"] += time.perf_counter() - score_start
+                for news, ppl in zip(chunk, perplexities):
+                    if ppl >= self.perplexity_threshold:
+                        stats["rejected"] += 1
+                    elif len(results) < count:
+                        results.append(news)
+                        stats["accepted"] += 1
+                        self._mark_seen([news])
+            if stats["stop_reason"] == "timeout":
+                break
+
+        stats["elapsed"] = time.perf_counter() - start_time
+        if stats["generated"]:
+            stats["acceptance_rate"] = stats["accepted"] / stats["generated"]
+        if stats["stop_reason"] != "completed":
+            logger.warning(
+                f"批量生成提前結束 ({stats['stop_reason']}): 需要 {count} 筆，取得 {len(results)} 筆，"
+                f"候選 {stats['generated']}，重複 {stats['duplicates']}，未達門檻 {stats['rejected']}"
+            )
+        return results, stats
+       
+    def save_to_file(self, results: List[Dict], filename: str = "generated_headlines.txt") -> None:
+         """將生成的假新聞標題儲存到檔案中
+
+         Args:
+             results: 生成的假新聞標題列表
+             filename: 儲存的檔案名，預設為 "generated_headlines.txt"
+         """
+         try:
+             with open(filename, "w", encoding="utf-8") as file:
+                 for i, headline in enumerate(results, 1):
+                     output = f"{i}. {headline['headline']} ({headline['category']})"
+                     file.write(output + "\n")
+             logger.info(f"已成功將 {len(results)} 筆假新聞標題儲存到 {filename}")
+             print(f"生成的標題已儲存到 {filename}")
+         except Exception as e:
+             logger.error(f"儲存檔案時發生錯誤: {e}")
+             print(f"儲存檔案時發生錯誤: {e}")     
+
+
+    
+    
+    
+    
+    
+    
+
+
+if __name__ == "__main__":
+    generator = FakeNewsGenerator()
+    print("=== 假新聞標題生成器 ===")
+    
+    while True:
+        try:
+            num = int(input("請輸入要生成的標題數量 (0退出): "))
+            if num <= 0:
+                break
+            results = generator.generate_batch(num)
+            # 顯示生成的標題
+            for i, headline in enumerate(results, 1):
+                output = f"{i}. {headline['headline']} ({headline['category']})"
+                print(output)
+
+
+            # 儲存結果到檔案
+            generator.save_to_file(results)
+                                
+        except ValueError:
             print("請輸入有效數字！")
\ No newline at end of file
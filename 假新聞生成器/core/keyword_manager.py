@@ -1,59 +1,169 @@
-
-
-import logging
-import random
-from db.repository import KeywordRepository
-
-logger = logging.getLogger(__name__)
-
-class KeywordManager:
-    """管理標題生成所需的關鍵詞"""
-    
-    def __init__(self, repository=None):
-        """初始化關鍵詞管理器"""
-        self.repository = repository or KeywordRepository()
-    
-    def get_random_keyword(self, category):
-        """獲取指定類別的隨機關鍵詞"""
-        keywords = self.repository.get_keywords_by_category(category)
-        
-        if not keywords or not keywords.get("words", []):
-            logger.warning(f"類別 '{category}' 未找到關鍵詞或為空")
-            return f"[{category}]"  # 如果沒有關鍵詞，返回類別名做為佔位符
-        
-        return random.choice(keywords["words"])
-    
-    def add_keyword(self, category, word):
-        """向指定類別添加新關鍵詞"""
-        return self.repository.add_keyword(category, word)
-    
-    def add_keywords_batch(self, category, words):
-        """批量添加關鍵詞"""
-        return self.repository.add_keywords_batch(category, words)
-    
-    def ensure_keywords_exist(self):
-        """確保系統中有基本關鍵詞"""
-        count = self.repository.count_keyword_categories()
-        
-        # 如果沒有關鍵詞，載入基本關鍵詞
-        if count == 0:
-            logger.info("沒有發現關鍵詞，正在載入默認關鍵詞...")
-            self._load_default_keywords()
-            logger.info("默認關鍵詞載入完成")
-        
-        return self.repository.count_keyword_categories()
-    
-    def _load_default_keywords(self):
-        """載入默認關鍵詞"""
-        keyword_categories = {
-            "人物": ["政府高官", "知名企業家", "國際明星", "資深記者", "著名科學家", 
-                    "反對派領導人", "神秘富豪", "退休將軍"],
-            "動作": ["簽署秘密協議", "洩露機密文件", "捐贈巨額資金", "突然辭職", 
-                    "私下會晤", "公開批評", "隱瞞真相", "秘密調查"],
-            "結果": ["引發全國關注", "導致股市崩盤", "激起民眾抗議", "促使政府干預", 
-                    "引起國際譴責", "造成嚴重後果", "震驚政界"],
-            # ... 更多默認關鍵詞 ...
-        }
-        
-        for category, words in keyword_categories.items():
-            self.repository.save_keyword_category(category, words)
\ No newline at end of file
+
+
+import logging
+import random
+import threading
+import time
+from db.repository import KeywordRepository
+from .generator import AliasTable
+
+logger = logging.getLogger(__name__)
+
+EXCLUDE_RETRIES = 8  # get_keyword 在加權類別中避開已使用關鍵詞時的重抽次數
+
+class KeywordManager:
+    """管理標題生成所需的關鍵詞"""
+    
+    def __init__(self, repository=None, cache_ttl=300, revisions=None):
+        """初始化關鍵詞管理器
+        
+        cache_ttl: 關鍵詞快取的存活秒數，None 表示不過期（只在寫入或收到變更通知時失效），0 表示不快取
+        revisions: RevisionRepository，設定後寫入時會遞增 "keywords" 修訂號通知其他行程
+        """
+        self.repository = repository or KeywordRepository()
+        self.cache_ttl = cache_ttl
+        self.revisions = revisions
+        self._cache = {}  # 類別 -> (關鍵詞 tuple, 權重 tuple 或 None, 別名表或 None, 載入時間)
+        self._cache_lock = threading.Lock()
+        # 失效世代：讀資料庫期間若快取被失效，讀到的舊值不寫入快取
+        self._generations = {}  # 類別 -> 該類別被失效的次數
+        self._generation = 0  # 全部類別被失效的次數
+    
+    def _get_entry(self, category):
+        """獲取指定類別的 (關鍵詞, 權重, 別名表)，經由行程內快取讀取
+        
+        類別文件可帶有 "weights": {關鍵詞: 權重}，未列出的關鍵詞權重為 1；
+        權重全部相同時不建別名表，使用均勻抽樣。
+        """
+        now = time.monotonic()
+        entry = self._cache.get(category)
+        if entry is not None and (self.cache_ttl is None or now - entry[3] < self.cache_ttl):
+            return entry[:3]
+        
+        with self._cache_lock:
+            generation = (self._generation, self._generations.get(category, 0))
+        keywords = self.repository.get_keywords_by_category(category)
+        words = tuple(keywords.get("words", [])) if keywords else ()
+        weights, table = None, None
+        word_weights = keywords.get("weights") if keywords else None
+        if word_weights and words:
+            weights = tuple(float(word_weights.get(word, 1.0)) for word in words)
+            if len(set(weights)) > 1:
+                table = AliasTable(weights)
+            else:
+                weights = None
+        if self.cache_ttl != 0:
+            with self._cache_lock:
+                if generation == (self._generation, self._generations.get(category, 0)):
+                    self._cache[category] = (words, weights, table, now)
+        return words, weights, table
+    
+    def get_words(self, category):
+        """獲取指定類別的所有關鍵詞（經由行程內快取讀取）"""
+        return self._get_entry(category)[0]
+    
+    def warm_cache(self, categories):
+        """預先把指定類別的關鍵詞讀入快取，返回有關鍵詞的類別數"""
+        return sum(1 for category in categories if self.get_words(category))
+    
+    def invalidate_cache(self, category=None):
+        """使指定類別（或全部）的快取失效"""
+        with self._cache_lock:
+            if category is None:
+                self._generation += 1
+                self._cache.clear()
+            else:
+                self._generations[category] = self._generations.get(category, 0) + 1
+                self._cache.pop(category, None)
+    
+    def get_random_keyword(self, category):
+        """獲取指定類別的隨機關鍵詞"""
+        words, _, table = self._get_entry(category)
+        
+        if not words:
+            logger.warning(f"類別 '{category}' 未找到關鍵詞或為空")
+            return f"[{category}]"  # 如果沒有關鍵詞，返回類別名做為佔位符
+        
+        return words[table.sample()] if table is not None else random.choice(words)
+    
+    def get_keyword(self, category, exclude=None):
+        """獲取指定類別的隨機關鍵詞，盡量避開 exclude 中已使用的詞；沒有關鍵詞時返回 None"""
+        words, weights, table = self._get_entry(category)
+        if not words:
+            return None
+        if table is None:
+            if exclude:
+                words = [word for word in words if word not in exclude] or words
+            return random.choice(words)
+        
+        # 加權類別：先以別名表抽樣幾次避開已使用的詞，都撞到時才在剩餘的詞中做 O(n) 加權抽樣
+        for _ in range(EXCLUDE_RETRIES):
+            word = words[table.sample()]
+            if not exclude or word not in exclude:
+                return word
+        candidates = [(word, weight) for word, weight in zip(words, weights) if word not in exclude]
+        if not candidates or not any(weight for _, weight in candidates):
+            return word
+        return random.choices([c[0] for c in candidates], weights=[c[1] for c in candidates])[0]
+    
+    def watch_revisions(self, watcher):
+        """訂閱 RevisionWatcher，其他行程修改關鍵詞時只讓變更的類別失效"""
+        watcher.subscribe("keywords", self._on_keywords_changed)
+    
+    def _on_keywords_changed(self, scope, revision, categories):
+        """修訂號變更回呼"""
+        if categories is None:
+            self.invalidate_cache()
+        else:
+            for category in categories:
+                self.invalidate_cache(category)
+    
+    def _keywords_written(self, categories=None):
+        """寫入後使本地快取失效並通知其他行程"""
+        if categories is None:
+            self.invalidate_cache()
+        else:
+            for category in categories:
+                self.invalidate_cache(category)
+        if self.revisions is not None:
+            self.revisions.bump("keywords", categories)
+    
+    def add_keyword(self, category, word):
+        """向指定類別添加新關鍵詞"""
+        result = self.repository.add_keyword(category, word)
+        self._keywords_written([category])
+        return result
+    
+    def add_keywords_batch(self, category, words):
+        """批量添加關鍵詞"""
+        result = self.repository.add_keywords_batch(category, words)
+        self._keywords_written([category])
+        return result
+    
+    def ensure_keywords_exist(self):
+        """確保系統中有基本關鍵詞"""
+        count = self.repository.count_keyword_categories()
+        
+        # 如果沒有關鍵詞，載入基本關鍵詞
+        if count == 0:
+            logger.info("沒有發現關鍵詞，正在載入默認關鍵詞...")
+            self._load_default_keywords()
+            logger.info("默認關鍵詞載入完成")
+        
+        return self.repository.count_keyword_categories()
+    
+    def _load_default_keywords(self):
+        """載入默認關鍵詞"""
+        keyword_categories = {
+            "人物": ["政府高官", "知名企業家", "國際明星", "資深記者", "著名科學家", 
+                    "反對派領導人", "神秘富豪", "退休將軍"],
+            "動作": ["簽署秘密協議", "洩露機密文件", "捐贈巨額資金", "突然辭職", 
+                    "私下會晤", "公開批評", "隱瞞真相", "秘密調查"],
+            "結果": ["引發全國關注", "導致股市崩盤", "激起民眾抗議", "促使政府干預", 
+                    "引起國際譴責", "造成嚴重後果", "震驚政界"],
+            # ... 更多默認關鍵詞 ...
+        }
+        
+        for category, words in keyword_categories.items():
+            self.repository.save_keyword_category(category, words)
+        self._keywords_written(list(keyword_categories))
\ No newline at end of file
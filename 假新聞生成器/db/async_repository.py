@@ -0,0 +1,164 @@
+import logging
+import random
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from config.settings import DATABASE_CONFIG
+from db.database import client_options
+from db.repository import (
+    add_chunk_result, chunk_result, headline_chunks, revision_bump_update, stamp_headline, with_write_concern
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabaseManager:
+    """管理非同步資料庫連接（Motor），供 FastAPI 等 asyncio 程式使用"""
+
+    _instance = None
+
+    def __new__(cls):
+        """單例模式實現"""
+        if cls._instance is None:
+            cls._instance = super(AsyncDatabaseManager, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        """初始化資料庫連接（Motor 客戶端在第一次操作時才真正連線）"""
+        self.config = DATABASE_CONFIG
+        connection_str = self.config.get("connection_string", "mongodb://localhost:27017/")
+        db_name = self.config.get("database_name", "fake_news_db")
+        self.client = AsyncIOMotorClient(connection_str, **client_options(self.config))
+        self.db = self.client[db_name]
+
+    def get_collection(self, collection_name):
+        """獲取指定的集合"""
+        return self.db[collection_name]
+
+    async def ping(self):
+        """檢查資料庫是否可用"""
+        try:
+            await self.client.admin.command("ping")
+            return True
+        except Exception as e:
+            logger.error(f"資料庫連接失敗: {str(e)}")
+            return False
+
+    def close(self):
+        """關閉資料庫連接，之後再建立的實例會使用新的客戶端"""
+        self.client.close()
+        if AsyncDatabaseManager._instance is self:
+            AsyncDatabaseManager._instance = None
+        logger.info("非同步資料庫連接已關閉")
+
+
+class AsyncHeadlineRepository:
+    """標題資料存取（非同步版，方法與 HeadlineRepository 對應）"""
+
+    def __init__(self, db_manager=None):
+        """初始化標題倉庫"""
+        self.db_manager = db_manager or AsyncDatabaseManager()
+        self.collection = self.db_manager.get_collection("headlines")
+
+    async def save_headline(self, headline_doc):
+        """保存單個標題；相同標題已存在時不重複寫入，返回已存在的文件"""
+        stamp_headline(headline_doc)
+
+        try:
+            result = await self.collection.insert_one(headline_doc)
+        except DuplicateKeyError:
+            headline_doc.pop("_id", None)  # insert_one 失敗時仍會留下自動產生的 _id
+            return await self.collection.find_one({"headline_hash": headline_doc["headline_hash"]})
+        headline_doc["_id"] = result.inserted_id
+        return headline_doc
+
+    async def save_headlines_batch(self, headlines, chunk_size=1000, ordered=False, write_concern=None):
+        """批量保存標題，返回成功寫入的數量（詳見 save_headlines_chunked）"""
+        report = await self.save_headlines_chunked(
+            headlines, chunk_size=chunk_size, ordered=ordered, write_concern=write_concern
+        )
+        return report["inserted"]
+
+    async def save_headlines_chunked(self, headlines, chunk_size=1000, ordered=False, write_concern=None):
+        """分塊批量保存標題，參數與返回的報告同 HeadlineRepository.save_headlines_chunked"""
+        collection = with_write_concern(self.collection, write_concern)
+        report = {"inserted": 0, "duplicates": 0, "errors": 0, "chunks": []}
+        for chunk in headline_chunks(headlines, chunk_size):
+            try:
+                result = await collection.insert_many(chunk, ordered=ordered)
+                add_chunk_result(report, chunk_result(len(chunk), result.inserted_ids))
+            except BulkWriteError as e:
+                add_chunk_result(report, chunk_result(len(chunk), error=e))
+        return report
+
+    async def find_headlines(self, query=None, limit=100, skip=0, sort_by=None):
+        """查詢標題"""
+        query = query or {}
+        sort_by = sort_by or [("created_at", -1)]
+
+        cursor = self.collection.find(query).sort(sort_by).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def search_text(self, text, limit=20):
+        """全文搜索標題"""
+        query = {"$text": {"$search": text}}
+        projection = {"score": {"$meta": "textScore"}}
+        sort = [("score", {"$meta": "textScore"})]
+
+        cursor = self.collection.find(query, projection).sort(sort).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def count_headlines(self, query=None):
+        """計數標題數量"""
+        return await self.collection.count_documents(query or {})
+
+
+class AsyncTemplateRepository:
+    """模板資料存取（非同步版，方法與 TemplateRepository 對應）"""
+
+    def __init__(self, db_manager=None):
+        """初始化模板倉庫"""
+        self.db_manager = db_manager or AsyncDatabaseManager()
+        self.collection = self.db_manager.get_collection("templates")
+        self.revisions = self.db_manager.get_collection("revisions")
+
+    async def _bump_revision(self, categories):
+        """遞增 "templates" 修訂號（與 RevisionRepository.bump 相同的原子更新）"""
+        doc = await self.revisions.find_one_and_update(
+            {"_id": "templates"},
+            revision_bump_update(categories),
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["revision"]
+
+    async def save_template(self, template_doc):
+        """保存模板"""
+        result = await self.collection.insert_one(template_doc)
+        template_doc["_id"] = result.inserted_id
+        await self._bump_revision([template_doc.get("category")])
+        return template_doc
+
+    async def get_random_template(self, category=None):
+        """獲取隨機模板"""
+        templates = await self.get_random_templates(1, category)
+        return templates[0] if templates else None
+
+    async def get_random_templates(self, count, category=None):
+        """一次聚合獲取 count 個隨機模板（可重複）"""
+        if count <= 0:
+            return []
+        match_stage = {"$match": {}} if category is None else {"$match": {"category": category}}
+        cursor = self.collection.aggregate([match_stage, {"$sample": {"size": count}}])
+        templates = await cursor.to_list(length=count)
+        if not templates or len(templates) >= count:
+            return templates
+        return random.choices(templates, k=count)
+
+    async def get_templates_by_category(self, category):
+        """獲取指定類別的模板"""
+        return await self.collection.find({"category": category}).to_list(length=None)
+
+    async def count_templates(self, query=None):
+        """計數模板數量"""
+        return await self.collection.count_documents(query or {})
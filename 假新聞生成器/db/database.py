@@ -1,85 +1,272 @@
-import logging
-from pymongo import MongoClient
-from config.settings import DATABASE_CONFIG
-
-logger = logging.getLogger(__name__)
-
-class DatabaseManager:
-    """管理資料庫連接"""
-    
-    _instance = None
-    
-    def __new__(cls):
-        """單例模式實現"""
-        if cls._instance is None:
-            cls._instance = super(DatabaseManager, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
-    
-    def _initialize(self):
-        """初始化資料庫連接"""
-        self.config = DATABASE_CONFIG
-        self.client = None
-        self.db = None
-        self.connected = False
-        self.connect()
-    
-    def connect(self):
-        """連接到資料庫"""
-        try:
-            connection_str = self.config.get("connection_string", "mongodb://localhost:27017/")
-            db_name = self.config.get("database_name", "fake_news_db")
-            
-            self.client = MongoClient(connection_str)
-            self.db = self.client[db_name]
-            self.connected = True
-            
-            # 驗證連接
-            self.client.server_info()
-            logger.info(f"成功連接到資料庫: {db_name}")
-            
-            return True
-            
-        except Exception as e:
-            self.connected = False
-            logger.error(f"資料庫連接失敗: {str(e)}")
-            return False
-    
-    def get_collection(self, collection_name):
-        """獲取指定的集合"""
-        if not self.connected:
-            if not self.connect():
-                raise ConnectionError("無法連接到資料庫")
-        
-        return self.db[collection_name]
-    
-    def create_indexes(self):
-        """為集合創建索引以提高性能"""
-        try:
-            # 為標題集合創建索引
-            headlines = self.get_collection("headlines")
-            headlines.create_index([("headline", "text")])  # 全文索引
-            headlines.create_index("category")              # 類別索引
-            headlines.create_index("created_at")            # 時間索引
-            
-            # 為模板集合創建索引
-            templates = self.get_collection("templates")
-            templates.create_index("category")
-            
-            # 為關鍵詞集合創建索引
-            keywords = self.get_collection("keywords")
-            keywords.create_index("category", unique=True)
-            
-            logger.info("資料庫索引創建完成")
-            return True
-            
-        except Exception as e:
-            logger.error(f"創建索引時失敗: {str(e)}")
-            return False
-    
-    def close(self):
-        """關閉資料庫連接"""
-        if self.client:
-            self.client.close()
-            self.connected = False
+import logging
+import threading
+import time
+from pymongo import MongoClient, monitoring
+from config.settings import DATABASE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+def client_options(config):
+    """從設定讀取連接池與逾時參數（同步與非同步客戶端共用）"""
+    options = {
+        "maxPoolSize": config.get("max_pool_size", 100),
+        "minPoolSize": config.get("min_pool_size", 0),
+        "maxIdleTimeMS": config.get("max_idle_time_ms"),
+        "waitQueueTimeoutMS": config.get("wait_queue_timeout_ms"),
+        "serverSelectionTimeoutMS": config.get("server_selection_timeout_ms", 5000),
+        "connectTimeoutMS": config.get("connect_timeout_ms", 5000),
+        "socketTimeoutMS": config.get("socket_timeout_ms"),
+    }
+    return {k: v for k, v in options.items() if v is not None}
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """統計連接池的使用情況"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.cleared = 0
+    
+    def snapshot(self):
+        """返回目前的統計值"""
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "created": self.created,
+                "closed": self.closed,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checked_out": self.checked_out,
+                "checkout_failures": self.checkout_failures,
+                "cleared": self.cleared,
+            }
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.cleared += 1
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+    
+    def connection_check_out_started(self, event):
+        pass
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+    
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """統計資料庫命令的次數與延遲"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = {}  # 命令名稱 -> [次數, 失敗次數, 總毫秒, 最大毫秒]
+    
+    def snapshot(self):
+        """返回每種命令的次數、失敗數與延遲（毫秒）"""
+        with self._lock:
+            return {
+                name: {
+                    "count": count,
+                    "failures": failures,
+                    "avg_ms": total_ms / count if count else 0.0,
+                    "max_ms": max_ms,
+                }
+                for name, (count, failures, total_ms, max_ms) in self.commands.items()
+            }
+    
+    def _record(self, event, failed):
+        duration_ms = event.duration_micros / 1000.0
+        with self._lock:
+            stats = self.commands.setdefault(event.command_name, [0, 0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += 1 if failed else 0
+            stats[2] += duration_ms
+            stats[3] = max(stats[3], duration_ms)
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        self._record(event, failed=False)
+    
+    def failed(self, event):
+        self._record(event, failed=True)
+
+
+class DatabaseManager:
+    """管理資料庫連接"""
+    
+    _instance = None
+    
+    def __new__(cls):
+        """單例模式實現"""
+        if cls._instance is None:
+            cls._instance = super(DatabaseManager, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+    
+    def _initialize(self):
+        """初始化資料庫連接"""
+        self.config = DATABASE_CONFIG
+        self.client = None
+        self.db = None
+        self.connected = False
+        self.connect_attempts = 0
+        self.reconnects = 0
+        self.last_error = None
+        self.pool_metrics = PoolMetricsListener()
+        self.command_metrics = CommandMetricsListener()
+        self._connect_lock = threading.RLock()  # 同一時間只有一個執行緒能建立或替換客戶端
+        # connect_on_demand 為 True 時不在建構時連線驗證，第一次操作才真正建立連接
+        if not self.config.get("connect_on_demand", False):
+            self.connect()
+    
+    def connect(self, verify=None):
+        """連接到資料庫
+        
+        verify: 是否立即驗證連接，預設在 connect_on_demand 關閉時驗證
+        """
+        if verify is None:
+            verify = not self.config.get("connect_on_demand", False)
+        with self._connect_lock:
+            return self._connect(verify)
+    
+    def _connect(self, verify):
+        """建立新的客戶端（呼叫端須持有 _connect_lock）"""
+        try:
+            connection_str = self.config.get("connection_string", "mongodb://localhost:27017/")
+            db_name = self.config.get("database_name", "fake_news_db")
+            
+            if self.connect_attempts:
+                self.reconnects += 1
+            self.connect_attempts += 1
+            if self.client:
+                self.client.close()
+            
+            options = client_options(self.config)
+            self.client = MongoClient(
+                connection_str,
+                connect=verify,
+                event_listeners=[self.pool_metrics, self.command_metrics],
+                **options
+            )
+            self.db = self.client[db_name]
+            self.connected = True
+            
+            # 驗證連接
+            if verify:
+                self.client.server_info()
+                logger.info(f"成功連接到資料庫: {db_name}")
+            
+            return True
+            
+        except Exception as e:
+            self.connected = False
+            self.last_error = str(e)
+            logger.error(f"資料庫連接失敗: {str(e)}")
+            return False
+    
+    def health(self, ping=True):
+        """返回連接狀態、ping 延遲、連接池與命令統計"""
+        status = {
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "pool": dict(self.pool_metrics.snapshot(), max_pool_size=self.config.get("max_pool_size", 100)),
+            "commands": self.command_metrics.snapshot(),
+        }
+        if ping:
+            status["ok"] = False
+            status["ping_ms"] = None
+            if self.client:
+                start = time.perf_counter()
+                try:
+                    self.client.admin.command("ping")
+                    status["ok"] = True
+                    status["ping_ms"] = (time.perf_counter() - start) * 1000
+                except Exception as e:
+                    # 只記錄失敗，不替換客戶端：pymongo 會自行重新連線，替換會中斷其他執行緒進行中的操作
+                    self.last_error = status["last_error"] = str(e)
+        return status
+    
+    def get_collection(self, collection_name):
+        """獲取指定的集合"""
+        if not self.connected:
+            with self._connect_lock:
+                # 其他執行緒可能已在等待鎖的期間完成連線
+                if not self.connected and not self.connect():
+                    raise ConnectionError("無法連接到資料庫")
+        
+        return self.db[collection_name]
+    
+    def create_indexes(self):
+        """為集合創建索引以提高性能"""
+        try:
+            # 為標題集合創建索引
+            headlines = self.get_collection("headlines")
+            headlines.create_index([("headline", "text")])  # 全文索引
+            headlines.create_index("category")              # 類別索引
+            headlines.create_index("created_at")            # 時間索引
+            headlines.create_index([("created_at", -1), ("_id", -1)])  # 鍵集分頁索引
+            headlines.create_index(                         # 全域去重索引（舊資料沒有雜湊時略過）
+                "headline_hash",
+                unique=True,
+                partialFilterExpression={"headline_hash": {"$exists": True}}
+            )
+            
+            # 為模板集合創建索引
+            templates = self.get_collection("templates")
+            templates.create_index("category")
+            
+            # 為關鍵詞集合創建索引
+            keywords = self.get_collection("keywords")
+            keywords.create_index("category", unique=True)
+            
+            logger.info("資料庫索引創建完成")
+            return True
+            
+        except Exception as e:
+            logger.error(f"創建索引時失敗: {str(e)}")
+            return False
+    
+    def close(self):
+        """關閉資料庫連接"""
+        if self.client:
+            self.client.close()
+            self.connected = False
             logger.info("資料庫連接已關閉")
\ No newline at end of file
@@ -0,0 +1,69 @@
+import logging
+import math
+import threading
+from db.repository import HeadlineRepository, headline_hash
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """以 64 位元雜湊為輸入的 Bloom filter（雙重雜湊產生 k 個位置）"""
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        """依預期容量與誤判率計算位元數與雜湊函數數量"""
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        value &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = value & 0xFFFFFFFF, (value >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        """加入一個 64 位元雜湊"""
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class HeadlineDeduplicator:
+    """跨行程、跨批次的標題去重
+
+    以 Bloom filter 在評分前排除已保存過的標題（可能有少量誤判，但不會漏判），
+    最終由 headlines 集合上的 headline_hash 唯一索引保證資料庫中不重複。
+    """
+
+    def __init__(self, repository=None, capacity=1000000, error_rate=0.001, preload=True):
+        """初始化去重器，preload 為 True 時從資料庫預載已保存的標題雜湊"""
+        self.repository = repository
+        self.bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        if preload:
+            self.preload()
+
+    def preload(self, batch_size=10000):
+        """從 headlines 集合載入所有雜湊"""
+        self.repository = self.repository or HeadlineRepository()
+        loaded = 0
+        for value in self.repository.iter_headline_hashes(batch_size=batch_size):
+            self.bloom.add(value)
+            loaded += 1
+        if loaded > self.bloom.capacity:
+            logger.warning(f"預載的標題數 {loaded} 超過 Bloom filter 容量 {self.bloom.capacity}，誤判率會上升")
+        logger.info(f"已預載 {loaded} 個標題雜湊到 Bloom filter")
+        return loaded
+
+    def might_contain(self, headline):
+        """標題可能已存在時返回 True；返回 False 時一定是新標題"""
+        return headline_hash(headline) in self.bloom
+
+    def add(self, headline):
+        """記錄新接受的標題"""
+        with self._lock:
+            self.bloom.add(headline_hash(headline))
@@ -1,110 +1,397 @@
-import logging
-from datetime import datetime
-from db.database import DatabaseManager
-
-logger = logging.getLogger(__name__)
-
-class HeadlineRepository:
-    """標題資料存取"""
-    
-    def __init__(self, db_manager=None):
-        """初始化標題倉庫"""
-        self.db_manager = db_manager or DatabaseManager()
-        self.collection = self.db_manager.get_collection("headlines")
-    
-    def save_headline(self, headline_doc):
-        """保存單個標題"""
-        # 確保有創建時間
-        if "created_at" not in headline_doc:
-            headline_doc["created_at"] = datetime.now()
-        
-        result = self.collection.insert_one(headline_doc)
-        headline_doc["_id"] = result.inserted_id
-        return headline_doc
-    
-    def save_headlines_batch(self, headlines):
-        """批量保存標題"""
-        # 確保每個標題都有創建時間
-        for headline in headlines:
-            if "created_at" not in headline:
-                headline["created_at"] = datetime.now()
-        
-        if headlines:
-            result = self.collection.insert_many(headlines)
-            return len(result.inserted_ids)
-        return 0
-    
-    def find_headlines(self, query=None, limit=100, skip=0, sort_by=None):
-        """查詢標題"""
-        query = query or {}
-        sort_by = sort_by or [("created_at", -1)]  # 默認按創建時間倒序
-        
-        cursor = self.collection.find(query).skip(skip).limit(limit).sort(sort_by)
-        return list(cursor)
-    
-    def search_text(self, text, limit=20):
-        """全文搜索標題"""
-        query = {"$text": {"$search": text}}
-        projection = {"score": {"$meta": "textScore"}}
-        sort = [("score", {"$meta": "textScore"})]
-        
-        cursor = self.collection.find(query, projection).limit(limit).sort(sort)
-        return list(cursor)
-    
-    def count_headlines(self, query=None):
-        """計數標題數量"""
-        query = query or {}
-        return self.collection.count_documents(query)
-    
-    def delete_headline(self, headline_id):
-        """刪除標題"""
-        result = self.collection.delete_one({"_id": headline_id})
-        return result.deleted_count
-    
-    def delete_headlines_by_query(self, query):
-        """批量刪除標題"""
-        result = self.collection.delete_many(query)
-        return result.deleted_count
-
-
-class TemplateRepository:
-    """模板資料存取"""
-    
-    def __init__(self, db_manager=None):
-        """初始化模板倉庫"""
-        self.db_manager = db_manager or DatabaseManager()
-        self.collection = self.db_manager.get_collection("templates")
-    
-    def save_template(self, template_doc):
-        """保存模板"""
-        result = self.collection.insert_one(template_doc)
-        template_doc["_id"] = result.inserted_id
-        return template_doc
-    
-    def save_templates_batch(self, templates):
-        """批量保存模板"""
-        if templates:
-            result = self.collection.insert_many(templates)
-            return len(result.inserted_ids)
-        return 0
-    
-    def get_random_template(self, category=None):
-        """獲取隨機模板"""
-        match_stage = {"$match": {}} if category is None else {"$match": {"category": category}}
-        sample_stage = {"$sample": {"size": 1}}
-        
-        pipeline = [match_stage, sample_stage]
-        result = list(self.collection.aggregate(pipeline))
-        
-        if result:
-            return result[0]
-        return None
-    
-    def get_templates_by_category(self, category):
-        """獲取指定類別的模板"""
-        return list(self.collection.find({"category": category}))
-    
-    def count_templates(self, query=None):
-        """計數模板數量"""
-        query = query or {}
-        return self.collection.count_documents(query)
\ No newline at end of file
+import hashlib
+import logging
+import random
+import unicodedata
+from datetime import datetime
+from itertools import islice
+from pymongo import ReturnDocument, WriteConcern
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from db.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+ALL_KEYS = "*"
+DUPLICATE_KEY_ERROR = 11000
+
+
+def normalize_headline(headline):
+    """正規化標題文字（NFKC、去除空白），作為去重的依據"""
+    return "".join(unicodedata.normalize("NFKC", headline).split())
+
+
+def headline_hash(headline):
+    """正規化標題的 64 位元雜湊（有號整數，可直接存為 MongoDB int64）"""
+    digest = hashlib.blake2b(normalize_headline(headline).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def stamp_headline(headline_doc, now=None):
+    """就地補上創建時間與去重雜湊（已有的欄位不覆蓋），返回同一份文件"""
+    if "created_at" not in headline_doc:
+        headline_doc["created_at"] = now or datetime.now()
+    if "headline_hash" not in headline_doc:
+        headline_doc["headline_hash"] = headline_hash(headline_doc["headline"])
+    return headline_doc
+
+
+def headline_chunks(headlines, chunk_size):
+    """把標題依 chunk_size 分塊，每塊是補上創建時間與雜湊的複本（不修改傳入的文件）"""
+    iterator = iter(headlines)
+    while True:
+        now = datetime.now()
+        chunk = [stamp_headline(dict(headline), now) for headline in islice(iterator, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def with_write_concern(collection, write_concern):
+    """套用寫入確認（WriteConcern 或其參數字典），None 時返回原集合"""
+    if write_concern is None:
+        return collection
+    if isinstance(write_concern, dict):
+        write_concern = WriteConcern(**write_concern)
+    return collection.with_options(write_concern=write_concern)
+
+
+def chunk_result(size, inserted_ids=None, error=None):
+    """整理一塊 insert_many 的結果；error 為 BulkWriteError 時區分重複鍵與其他錯誤"""
+    result = {"size": size, "inserted": 0, "duplicates": 0, "errors": 0}
+    if error is None:
+        result["inserted"] = len(inserted_ids)
+        return result
+    result["inserted"] = error.details.get("nInserted", 0)
+    for write_error in error.details.get("writeErrors", []):
+        if write_error.get("code") == DUPLICATE_KEY_ERROR:
+            result["duplicates"] += 1
+        else:
+            result["errors"] += 1
+    if result["errors"]:
+        logger.error(f"批量保存標題時有 {result['errors']} 筆寫入失敗")
+    return result
+
+
+def add_chunk_result(report, result):
+    """把一塊的結果累加到 save_headlines_chunked 的報告中"""
+    for key in ("inserted", "duplicates", "errors"):
+        report[key] += result[key]
+    report["chunks"].append(result)
+
+
+def revision_bump_update(keys=None):
+    """遞增修訂號並把變更的鍵記為新修訂號的管線更新（單一原子操作，需 MongoDB 4.2+）"""
+    keys = [key for key in keys or () if key] or [ALL_KEYS]
+    return [
+        {"$set": {"revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]}}},
+        {"$set": {f"keys.{key}": "$revision" for key in keys}},
+    ]
+
+
+class HeadlineRepository:
+    """標題資料存取"""
+    
+    def __init__(self, db_manager=None):
+        """初始化標題倉庫"""
+        self.db_manager = db_manager or DatabaseManager()
+    
+    @property
+    def collection(self):
+        """標題集合（每次經由 db_manager 取得，重新連線後即使用新的客戶端）"""
+        return self.db_manager.get_collection("headlines")
+    
+    def save_headline(self, headline_doc):
+        """保存單個標題；相同標題已存在時不重複寫入，返回已存在的文件"""
+        stamp_headline(headline_doc)
+        
+        try:
+            result = self.collection.insert_one(headline_doc)
+        except DuplicateKeyError:
+            headline_doc.pop("_id", None)  # insert_one 失敗時仍會留下自動產生的 _id
+            return self.collection.find_one({"headline_hash": headline_doc["headline_hash"]})
+        headline_doc["_id"] = result.inserted_id
+        return headline_doc
+    
+    def save_headlines_batch(self, headlines, chunk_size=1000, ordered=False, write_concern=None):
+        """批量保存標題，返回成功寫入的數量（詳見 save_headlines_chunked）"""
+        return self.save_headlines_chunked(
+            headlines, chunk_size=chunk_size, ordered=ordered, write_concern=write_concern
+        )["inserted"]
+    
+    def save_headlines_chunked(self, headlines, chunk_size=1000, ordered=False, write_concern=None):
+        """分塊批量保存標題
+        
+        headlines: 標題文件的可迭代物件（可以是生成器），不會修改傳入的文件
+        ordered: 為 False 時單一文件失敗不會中止同一塊中其他文件的寫入
+        write_concern: WriteConcern 或其參數字典（如 {"w": 1, "j": False}），None 使用集合預設值
+        返回 {"inserted", "duplicates", "errors", "chunks": [每塊的結果]}；重複鍵錯誤只計數不拋出
+        """
+        collection = with_write_concern(self.collection, write_concern)
+        report = {"inserted": 0, "duplicates": 0, "errors": 0, "chunks": []}
+        for chunk in headline_chunks(headlines, chunk_size):
+            try:
+                result = collection.insert_many(chunk, ordered=ordered)
+                add_chunk_result(report, chunk_result(len(chunk), result.inserted_ids))
+            except BulkWriteError as e:
+                add_chunk_result(report, chunk_result(len(chunk), error=e))
+        
+        return report
+    
+    def find_headlines(self, query=None, limit=100, skip=0, sort_by=None):
+        """查詢標題"""
+        query = query or {}
+        sort_by = sort_by or [("created_at", -1)]  # 默認按創建時間倒序
+        
+        cursor = self.collection.find(query).skip(skip).limit(limit).sort(sort_by)
+        return list(cursor)
+    
+    def find_headlines_after(self, query=None, limit=100, after=None, projection=None, ascending=False):
+        """以 (created_at, _id) 鍵集分頁查詢標題，每頁成本與頁碼無關
+        
+        after: 上一頁返回的游標 (created_at, _id)，None 表示第一頁
+        返回 (標題列表, 下一頁游標)；沒有更多資料時游標為 None
+        """
+        order = 1 if ascending else -1
+        filters = [query] if query else []
+        if after is not None:
+            created_at, last_id = after
+            op = "$gt" if ascending else "$lt"
+            filters.append({"$or": [
+                {"created_at": {op: created_at}},
+                {"created_at": created_at, "_id": {op: last_id}}
+            ]})
+        if not filters:
+            keyset_query = {}
+        elif len(filters) == 1:
+            keyset_query = filters[0]
+        else:
+            keyset_query = {"$and": filters}
+        
+        cursor = self.collection.find(keyset_query, self._keyset_projection(projection))
+        cursor = cursor.sort([("created_at", order), ("_id", order)]).limit(limit)
+        docs = list(cursor)
+        
+        next_after = None
+        if len(docs) == limit and docs:
+            next_after = (docs[-1]["created_at"], docs[-1]["_id"])
+        return docs, next_after
+    
+    def iter_headlines(self, query=None, batch_size=1000, projection=None, ascending=False):
+        """逐批串流所有符合條件的標題（以鍵集分頁，不會長時間佔用同一個游標）"""
+        after = None
+        while True:
+            docs, after = self.find_headlines_after(
+                query, limit=batch_size, after=after, projection=projection, ascending=ascending
+            )
+            yield from docs
+            if after is None:
+                break
+    
+    @staticmethod
+    def _keyset_projection(projection):
+        """確保投影包含分頁所需的 created_at 與 _id"""
+        if not projection:
+            return None
+        projection = dict(projection)
+        projection.pop("_id", None)
+        if any(projection.values()):
+            projection["created_at"] = 1
+        else:
+            projection.pop("created_at", None)
+        return projection or None
+    
+    def search_text(self, text, limit=20):
+        """全文搜索標題"""
+        query = {"$text": {"$search": text}}
+        projection = {"score": {"$meta": "textScore"}}
+        sort = [("score", {"$meta": "textScore"})]
+        
+        cursor = self.collection.find(query, projection).limit(limit).sort(sort)
+        return list(cursor)
+    
+    def iter_headline_hashes(self, batch_size=10000):
+        """串流所有已保存標題的去重雜湊（用於預載 Bloom filter）"""
+        cursor = self.collection.find(
+            {"headline_hash": {"$exists": True}}, {"headline_hash": 1, "_id": 0}
+        ).batch_size(batch_size)
+        for doc in cursor:
+            yield doc["headline_hash"]
+    
+    def count_headlines(self, query=None):
+        """計數標題數量"""
+        query = query or {}
+        return self.collection.count_documents(query)
+    
+    def delete_headline(self, headline_id):
+        """刪除標題"""
+        result = self.collection.delete_one({"_id": headline_id})
+        return result.deleted_count
+    
+    def delete_headlines_by_query(self, query):
+        """批量刪除標題"""
+        result = self.collection.delete_many(query)
+        return result.deleted_count
+
+
+class TemplateRepository:
+    """模板資料存取"""
+    
+    def __init__(self, db_manager=None, revisions=None, use_snapshot=False):
+        """初始化模板倉庫
+        
+        use_snapshot: 為 True 時第一次抽樣會把模板載入本地快照，之後在記憶體中抽樣
+        """
+        self.db_manager = db_manager or DatabaseManager()
+        self.revisions = revisions or RevisionRepository(self.db_manager)
+        self.use_snapshot = use_snapshot
+        self._snapshot = None  # 類別 -> 模板列表
+        self._snapshot_all = []
+    
+    @property
+    def collection(self):
+        """模板集合"""
+        return self.db_manager.get_collection("templates")
+    
+    def save_template(self, template_doc):
+        """保存模板"""
+        result = self.collection.insert_one(template_doc)
+        template_doc["_id"] = result.inserted_id
+        self.revisions.bump("templates", [template_doc.get("category")])
+        self._add_to_snapshot([template_doc])
+        return template_doc
+    
+    def save_templates_batch(self, templates):
+        """批量保存模板"""
+        if templates:
+            result = self.collection.insert_many(templates)
+            self.revisions.bump("templates", {t.get("category") for t in templates})
+            self._add_to_snapshot(templates)
+            return len(result.inserted_ids)
+        return 0
+    
+    def load_snapshot(self):
+        """把所有模板載入本地快照"""
+        snapshot = {}
+        for doc in self.collection.find({}):
+            snapshot.setdefault(doc.get("category"), []).append(doc)
+        self._set_snapshot(snapshot)
+        logger.info(f"已載入 {len(self._snapshot_all)} 個模板到本地快照")
+        return len(self._snapshot_all)
+    
+    def reload_categories(self, categories):
+        """只重新載入指定類別的模板"""
+        if self._snapshot is None:
+            return self.load_snapshot()
+        snapshot = {c: docs for c, docs in self._snapshot.items() if c not in categories}
+        for doc in self.collection.find({"category": {"$in": list(categories)}}):
+            snapshot.setdefault(doc.get("category"), []).append(doc)
+        self._set_snapshot(snapshot)
+        return len(self._snapshot_all)
+    
+    def watch_revisions(self, watcher):
+        """訂閱 RevisionWatcher，其他行程修改模板時增量更新快照"""
+        watcher.subscribe("templates", self._on_templates_changed)
+    
+    def _on_templates_changed(self, scope, revision, categories):
+        """修訂號變更回呼"""
+        if self._snapshot is None:
+            return
+        if categories is None:
+            self.load_snapshot()
+        else:
+            self.reload_categories(categories)
+    
+    def _set_snapshot(self, snapshot):
+        # 整份替換，讀取端不需要加鎖
+        self._snapshot_all = [doc for docs in snapshot.values() for doc in docs]
+        self._snapshot = snapshot
+    
+    def _add_to_snapshot(self, templates):
+        if self._snapshot is None:
+            return
+        snapshot = {c: list(docs) for c, docs in self._snapshot.items()}
+        for doc in templates:
+            snapshot.setdefault(doc.get("category"), []).append(doc)
+        self._set_snapshot(snapshot)
+    
+    def _snapshot_candidates(self, category):
+        if self._snapshot is None:
+            self.load_snapshot()
+        if category is None:
+            return self._snapshot_all
+        return self._snapshot.get(category, [])
+    
+    def get_random_template(self, category=None):
+        """獲取隨機模板"""
+        if self.use_snapshot:
+            candidates = self._snapshot_candidates(category)
+            return random.choice(candidates) if candidates else None
+        
+        match_stage = {"$match": {}} if category is None else {"$match": {"category": category}}
+        sample_stage = {"$sample": {"size": 1}}
+        
+        pipeline = [match_stage, sample_stage]
+        result = list(self.collection.aggregate(pipeline))
+        
+        if result:
+            return result[0]
+        return None
+    
+    def get_random_templates(self, count, category=None):
+        """一次獲取 count 個隨機模板（可重複），供批量生成使用"""
+        if count <= 0:
+            return []
+        if self.use_snapshot:
+            candidates = self._snapshot_candidates(category)
+        else:
+            # 一次聚合取回最多 count 個不重複模板，不足時再於本地重複抽樣
+            match_stage = {"$match": {}} if category is None else {"$match": {"category": category}}
+            candidates = list(self.collection.aggregate([match_stage, {"$sample": {"size": count}}]))
+            if len(candidates) >= count:
+                return candidates
+        return random.choices(candidates, k=count) if candidates else []
+    
+    def get_all_templates(self):
+        """獲取所有模板（use_snapshot 時從本地快照返回，尚未載入時先載入）"""
+        if self.use_snapshot:
+            return list(self._snapshot_candidates(None))
+        return list(self.collection.find({}))
+    
+    def get_templates_by_category(self, category):
+        """獲取指定類別的模板"""
+        return list(self.collection.find({"category": category}))
+    
+    def count_templates(self, query=None):
+        """計數模板數量"""
+        query = query or {}
+        return self.collection.count_documents(query)
+
+class RevisionRepository:
+    """修訂號資料存取（跨行程通知模板與關鍵詞的變更）
+    
+    每個範圍（如 "templates"、"keywords"）一份文件：
+    {"_id": 範圍, "revision": 遞增的修訂號, "keys": {變更的鍵: 最後變更時的修訂號}}
+    未指定鍵的變更記錄在 ALL_KEYS ("*") 之下，表示整個範圍都需要重新載入。
+    """
+    
+    def __init__(self, db_manager=None):
+        """初始化修訂號倉庫"""
+        self.db_manager = db_manager or DatabaseManager()
+    
+    @property
+    def collection(self):
+        """修訂號集合"""
+        return self.db_manager.get_collection("revisions")
+    
+    def bump(self, scope, keys=None):
+        """遞增指定範圍的修訂號，並在同一次更新中記錄這次變更的鍵（如類別）"""
+        doc = self.collection.find_one_and_update(
+            {"_id": scope},
+            revision_bump_update(keys),
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["revision"]
+    
+    def get_revisions(self, scopes):
+        """獲取多個範圍的修訂文件"""
+        return {doc["_id"]: doc for doc in self.collection.find({"_id": {"$in": list(scopes)}})}
@@ -0,0 +1,118 @@
+import logging
+import threading
+from db.repository import ALL_KEYS, RevisionRepository
+
+logger = logging.getLogger(__name__)
+
+class RevisionWatcher:
+    """監聽修訂號變更並通知訂閱者
+    
+    優先使用 MongoDB change stream（需要副本集），不支援時退回定期輪詢。
+    訂閱者的回呼格式為 callback(scope, revision, changed_keys)，
+    changed_keys 為變更的鍵列表；無法得知變更範圍時為 None，表示需要全部重新載入。
+    """
+    
+    def __init__(self, repository=None, poll_interval=2.0, use_change_stream=True):
+        """初始化監聽器"""
+        self.repository = repository or RevisionRepository()
+        self.poll_interval = poll_interval
+        self.use_change_stream = use_change_stream
+        self._subscribers = {}  # 範圍 -> 回呼列表
+        self._seen = {}  # 範圍 -> (修訂號, {鍵: 修訂號})
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def subscribe(self, scope, callback):
+        """訂閱指定範圍的變更"""
+        with self._lock:
+            self._subscribers.setdefault(scope, []).append(callback)
+            if scope not in self._seen:
+                self._seen[scope] = self._read_revision(scope)
+    
+    def unsubscribe(self, scope, callback):
+        """取消訂閱"""
+        with self._lock:
+            callbacks = self._subscribers.get(scope, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+    
+    def _read_revision(self, scope):
+        doc = self.repository.get_revisions([scope]).get(scope) or {}
+        return doc.get("revision", 0), dict(doc.get("keys", {}))
+    
+    def check(self):
+        """讀取一次修訂號，通知有變更的訂閱者，返回有變更的範圍數"""
+        with self._lock:
+            scopes = [scope for scope, callbacks in self._subscribers.items() if callbacks]
+        if not scopes:
+            return 0
+        
+        docs = self.repository.get_revisions(scopes)
+        changed = 0
+        for scope in scopes:
+            doc = docs.get(scope) or {}
+            revision = doc.get("revision", 0)
+            keys = dict(doc.get("keys", {}))
+            with self._lock:
+                last_revision, last_keys = self._seen.get(scope, (0, {}))
+                if revision <= last_revision:
+                    continue
+                self._seen[scope] = (revision, keys)
+                callbacks = list(self._subscribers.get(scope, []))
+            
+            changed_keys = [key for key, key_revision in keys.items()
+                            if key_revision > last_keys.get(key, 0)]
+            # 未指定鍵的變更（記錄為 "*"）需要全部重新載入
+            if not changed_keys or ALL_KEYS in changed_keys:
+                changed_keys = None
+            
+            changed += 1
+            logger.info(f"偵測到 '{scope}' 修訂號變更: {last_revision} -> {revision}, 變更的鍵: {changed_keys}")
+            for callback in callbacks:
+                try:
+                    callback(scope, revision, changed_keys)
+                except Exception as e:
+                    logger.error(f"執行 '{scope}' 變更回呼時發生錯誤: {str(e)}")
+        return changed
+    
+    def start(self):
+        """在背景執行緒中開始監聽"""
+        if self._thread and self._thread.is_alive():
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="revision-watcher", daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self, timeout=5):
+        """停止監聽"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _watch_loop(self):
+        """監聽循環：change stream 失敗時退回輪詢"""
+        if self.use_change_stream:
+            try:
+                self._watch_change_stream()
+                return
+            except Exception as e:
+                # 單機 mongod 或測試用替身不支援 change stream
+                logger.info(f"無法使用 change stream，改為每 {self.poll_interval} 秒輪詢: {str(e)}")
+        
+        while not self._stop_event.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"輪詢修訂號時發生錯誤: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
+    
+    def _watch_change_stream(self):
+        """透過 change stream 監聽修訂文件"""
+        with self.repository.collection.watch(max_await_time_ms=int(self.poll_interval * 1000)) as stream:
+            self.check()  # 補上開始監聽前的變更
+            while not self._stop_event.is_set():
+                if stream.try_next() is not None:
+                    self.check()
@@ -0,0 +1,126 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from db.repository import HeadlineRepository
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class HeadlineWriteBuffer:
+    """標題寫入緩衝區（write-behind）
+
+    生成端把標題文件放入有界佇列後立即返回，背景執行緒依數量或時間分批寫入資料庫。
+    佇列滿時 put 會阻塞（或在 timeout 後返回 False），形成背壓。
+    """
+
+    def __init__(self, repository=None, max_batch=500, flush_interval=1.0, max_pending=10000,
+                 chunk_size=1000, write_concern=None, flush_on_exit=True):
+        """初始化寫入緩衝區"""
+        self.repository = repository or HeadlineRepository()
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        self.write_concern = write_concern
+        self.stats = {"queued": 0, "inserted": 0, "duplicates": 0, "errors": 0, "rejected": 0, "flushes": 0}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._lock = threading.Lock()  # 檢查 _closed 與放入佇列在同一鎖內，close 之後不會再有文件排在 _STOP 後面
+        self._stats_lock = threading.Lock()  # 只保護 stats，不可在持有時阻塞
+        self._thread = threading.Thread(target=self._flush_loop, name="headline-write-buffer", daemon=True)
+        self._thread.start()
+        if flush_on_exit:
+            atexit.register(self.close)
+
+    def put(self, headline_doc, block=True, timeout=None):
+        """放入一個標題文件，佇列已滿且逾時（或 block=False）時返回 False"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("寫入緩衝區已關閉")
+            try:
+                self._queue.put(headline_doc, block=block, timeout=timeout)
+            except queue.Full:
+                self._count("rejected")
+                return False
+        self._count("queued")
+        return True
+
+    def put_many(self, headline_docs, block=True, timeout=None):
+        """放入多個標題文件，返回成功放入的數量"""
+        count = 0
+        for headline_doc in headline_docs:
+            if not self.put(headline_doc, block=block, timeout=timeout):
+                break
+            count += 1
+        return count
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+    
+    def pending(self):
+        """尚未寫入的文件數（近似值）"""
+        return self._queue.qsize()
+
+    def flush(self):
+        """阻塞直到目前佇列中的所有文件都已寫入"""
+        self._queue.join()
+
+    def close(self, timeout=30):
+        """停止接收新文件，寫入剩餘的文件並結束背景執行緒"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"寫入緩衝區未在 {timeout} 秒內清空，仍有約 {self.pending()} 筆未寫入")
+        try:
+            atexit.unregister(self.close)
+        except Exception:
+            pass
+
+    def _flush_loop(self):
+        """背景寫入循環：累積到 max_batch 筆或等待 flush_interval 秒後寫入"""
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = None
+            while len(batch) < self.max_batch:
+                if deadline is None:
+                    item = self._queue.get()  # 閒置時一直等待第一筆
+                    deadline = time.monotonic() + self.flush_interval
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        """寫入一批文件，失敗只記錄不中止循環"""
+        try:
+            report = self.repository.save_headlines_chunked(
+                batch, chunk_size=self.chunk_size, write_concern=self.write_concern
+            )
+            for key in ("inserted", "duplicates", "errors"):
+                self._count(key, report[key])
+        except Exception as e:
+            self._count("errors", len(batch))
+            logger.error(f"寫入緩衝區保存 {len(batch)} 筆標題時發生錯誤: {str(e)}")
+        self._count("flushes")